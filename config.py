@@ -1,4 +1,5 @@
 # backend/config.py
+from typing import List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,6 +9,78 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     GEMINI_API_KEY: str = ""
 
+    # Database engine / pooling
+    DB_ECHO: bool = True
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    READ_REPLICA_URL: str = ""  # empty -> reads go to DATABASE_URL
+    READ_YOUR_WRITES_SECONDS: int = 5  # route a client's reads to the primary after it writes
+
+    # Task sharding (empty -> tasks live in DATABASE_URL)
+    TASK_SHARD_URLS: List[str] = []  # JSON list in env, index == shard number
+    SHARD_ID_STRIDE: int = 1_000_000_000_000  # disjoint task id ranges per shard (Postgres)
+    SHARD_MIGRATION_BATCH_SIZE: int = 1000
+    SHARD_MIGRATION_GRACE_SECONDS: float = 2.0  # let in-flight writes finish after locking
+    SHARD_ALLOW_NON_POSTGRES: bool = False  # local testing only: no per-shard id ranges
+
+    # Archival of long-past tasks into task_archive
+    ARCHIVE_ENABLED: bool = False  # single-runner via advisory lock on Postgres; enable on one worker elsewhere
+    ARCHIVE_AFTER_DAYS: int = 90  # archive tasks whose due date is older than this
+    ARCHIVE_RETENTION_DAYS: int = 0  # purge archived tasks after this many days, 0 keeps them
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5  # throttle between batches
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    # Bulk export / import
+    EXPORT_FETCH_SIZE: int = 1000  # rows per server-side cursor fetch
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 100  # per-line errors reported back (all are counted)
+
+    # Idempotency-Key handling for task writes and chat
+    IDEMPOTENCY_STORE: str = "memory"  # memory | database
+    IDEMPOTENCY_PATHS: List[str] = ["/tasks", "/chat"]
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # how long a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 120  # an unfinished request's claim is abandoned after this
+    IDEMPOTENCY_WAIT_SECONDS: float = 30  # how long a concurrent duplicate waits for the first
+
+    # Admission control: per-route-class concurrency, queue bound and queue-wait target
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CHAT_CONCURRENCY: int = 8
+    ADMISSION_CHAT_QUEUE: int = 16
+    ADMISSION_CHAT_TARGET_MS: int = 10000
+    ADMISSION_AUTH_CONCURRENCY: int = 4  # bcrypt is CPU bound
+    ADMISSION_AUTH_QUEUE: int = 32
+    ADMISSION_AUTH_TARGET_MS: int = 1000
+    ADMISSION_TASKS_CONCURRENCY: int = 32
+    ADMISSION_TASKS_QUEUE: int = 128
+    ADMISSION_TASKS_TARGET_MS: int = 500
+    ADMISSION_BULK_CONCURRENCY: int = 2  # export / import / semantic index builds
+    ADMISSION_BULK_QUEUE: int = 8
+    ADMISSION_BULK_TARGET_MS: int = 5000
+
+    # Semantic task search
+    EMBEDDER: str = "hashing"  # "hashing" or "package.module:ClassName"
+    EMBEDDING_DIM: int = 256
+    SEMANTIC_INDEX_DIR: str = "data/semantic_index"
+    SEMANTIC_INDEX_CACHE_SIZE: int = 256  # per-user indexes kept open
+
+    # "What should I do next" agenda scoring
+    AGENDA_WEIGHT_PRIORITY: float = 1.0
+    AGENDA_WEIGHT_DUE: float = 1.5  # closeness of an upcoming due date
+    AGENDA_WEIGHT_OVERDUE: float = 2.0
+    AGENDA_WEIGHT_AGE: float = 0.3  # time since created_at
+    AGENDA_DUE_HALF_LIFE_HOURS: float = 48  # due-date urgency halves every this many hours
+    AGENDA_AGE_SATURATION_DAYS: float = 30  # age score maxes out after this
+    AGENDA_CACHE_SIZE: int = 1024  # users whose columnar arrays are kept
+    AGENDA_CACHE_TTL_SECONDS: int = 60  # backstop for writes made by other workers
+
+    # Startup
+    AUTO_CREATE_SCHEMA: bool = True  # set False when schema is managed by migrations
+    BOOT_TIME_BUDGET_MS: int = 2000
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # <- ignore extra env variables
@@ -1,5 +1,4 @@
-import google.genai as genai
-from google.genai import types
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from sqlmodel import Session
@@ -50,6 +49,19 @@ class ListTasksToolArgs(BaseModel):
         None,
         description="Low, Medium, or High"
     )
+    include_archived: Optional[bool] = Field(
+        False,
+        description="Also search archived (long past due) tasks"
+    )
+
+
+class SemanticSearchToolArgs(BaseModel):
+    query: str = Field(..., description="What the tasks are about, e.g. 'dentist'")
+    limit: Optional[int] = Field(5, description="Maximum number of tasks to return")
+
+
+class AgendaToolArgs(BaseModel):
+    limit: Optional[int] = Field(5, description="How many tasks to suggest")
 
 
 # =====================================================
@@ -98,6 +110,7 @@ async def list_tasks_tool_func(
     title: Optional[str] = None,
     due_date: Optional[str] = None,
     priority: Optional[str] = None,
+    include_archived: Optional[bool] = False,
 ) -> List[Dict[str, Any]]:
 
     priority_enum = None
@@ -113,6 +126,7 @@ async def list_tasks_tool_func(
         title=title,
         due_date=due_date,
         priority=priority_enum,
+        include_archived=bool(include_archived),
     )
 
     return [
@@ -137,7 +151,7 @@ async def update_task_tool_func(
     except ValueError:
         return {"error": "Task ID must be integer"}
 
-    db_task = get_task_by_id(session, task_id_int, user_id)
+    db_task = get_task_by_id(session, task_id_int, user_id, include_archived=True)
     if not db_task:
         return {"error": "Task not found"}
 
@@ -179,7 +193,7 @@ async def delete_task_tool_func(
     except ValueError:
         return {"error": "Task ID must be integer"}
 
-    db_task = get_task_by_id(session, task_id_int, user_id)
+    db_task = get_task_by_id(session, task_id_int, user_id, include_archived=True)
     if not db_task:
         return {"error": "Task not found"}
 
@@ -187,6 +201,37 @@ async def delete_task_tool_func(
     return {"message": f"Task '{db_task.title}' deleted"}
 
 
+async def semantic_search_tool_func(
+    session: Session,
+    user_id: int,
+    query: str,
+    limit: Optional[int] = 5,
+) -> List[Dict[str, Any]]:
+
+    from services.semantic_index import semantic_search  # numpy loaded on first use
+
+    hits = semantic_search(session, user_id, query, k=max(1, min(int(limit or 5), 50)))
+    return [
+        {**TaskResponse.model_validate(task).model_dump(mode="json"), "score": round(score, 4)}
+        for task, score in hits
+    ]
+
+
+async def agenda_tool_func(
+    session: Session,
+    user_id: int,
+    limit: Optional[int] = 5,
+) -> List[Dict[str, Any]]:
+
+    from services.agenda import top_agenda  # numpy loaded on first use
+
+    ranked = top_agenda(session, user_id, limit=max(1, min(int(limit or 5), 50)))
+    return [
+        {**TaskResponse.model_validate(task).model_dump(mode="json"), "score": round(score, 4), "overdue": overdue}
+        for task, score, overdue in ranked
+    ]
+
+
 # =====================================================
 # 🔹 Tool Map
 # =====================================================
@@ -196,45 +241,45 @@ ai_tool_map = {
     "list_tasks": list_tasks_tool_func,
     "update_task": update_task_tool_func,
     "delete_task": delete_task_tool_func,
+    "semantic_search_tasks": semantic_search_tool_func,
+    "get_agenda": agenda_tool_func,
 }
 
 
 # =====================================================
-# 🔹 Gemini Tool Declarations (NO CLEANING NEEDED)
+# 🔹 Gemini Tool Declarations (built on first use)
 # =====================================================
 
-available_tools_for_gemini = [
-    types.Tool(function_declarations=[
-        types.FunctionDeclaration(
-            name="create_task",
-            description="Create a task",
-            parameters=CreateTaskToolArgs.model_json_schema(),
-        )
-    ]),
-    types.Tool(function_declarations=[
-        types.FunctionDeclaration(
-            name="list_tasks",
-            description="List tasks",
-            parameters=ListTasksToolArgs.model_json_schema(),
-        )
-    ]),
-    types.Tool(function_declarations=[
-        types.FunctionDeclaration(
-            name="update_task",
-            description="Update a task",
-            parameters=UpdateTaskToolArgs.model_json_schema(),
-        )
-    ]),
-    types.Tool(function_declarations=[
-        types.FunctionDeclaration(
-            name="delete_task",
-            description="Delete a task",
-            parameters=DeleteTaskToolArgs.model_json_schema(),
-        )
-    ]),
+_tool_declarations = [
+    ("create_task", "Create a task", CreateTaskToolArgs),
+    ("list_tasks", "List tasks", ListTasksToolArgs),
+    ("update_task", "Update a task", UpdateTaskToolArgs),
+    ("delete_task", "Delete a task", DeleteTaskToolArgs),
+    ("semantic_search_tasks", "Find tasks by meaning, not exact title", SemanticSearchToolArgs),
+    ("get_agenda", "Suggest what to work on next, most urgent first", AgendaToolArgs),
 ]
 
 
+@lru_cache(maxsize=1)
+def get_available_tools_for_gemini() -> list:
+    """
+    Build the Gemini tool declarations once, on first use.
+    Keeps the google.genai import and JSON schema generation off the boot path.
+    """
+    from google.genai import types
+
+    return [
+        types.Tool(function_declarations=[
+            types.FunctionDeclaration(
+                name=name,
+                description=description,
+                parameters=args_model.model_json_schema(),
+            )
+        ])
+        for name, description, args_model in _tool_declarations
+    ]
+
+
 # =====================================================
 # 🔹 Tool Runner
 # =====================================================
@@ -0,0 +1,73 @@
+# backend/core/embeddings.py
+"""
+Text embedders for semantic task search.
+
+The default HashingEmbedder is fully offline: words and character 3-grams
+are hashed into a fixed number of buckets (signed feature hashing) and the
+result is L2-normalised, so a dot product is a cosine similarity.
+
+Any other embedder can be plugged in through settings.EMBEDDER as
+"package.module:ClassName"; it needs a `dim` attribute and an
+`embed(texts) -> np.ndarray[float32] of shape (len(texts), dim)` method
+returning normalised rows.
+"""
+import importlib
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = 256, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in _WORD.findall(text.lower()):
+            features.append(word)
+            padded = f"#{word}#"
+            features.extend(padded[i:i + self.ngram] for i in range(max(1, len(padded) - self.ngram + 1)))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in self._features(text)),
+                dtype=np.uint32,
+            )
+            if not hashes.size:
+                continue
+            buckets = (hashes % self.dim).astype(np.intp)
+            signs = np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], buckets, signs)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    if settings.EMBEDDER == "hashing":
+        return HashingEmbedder(dim=settings.EMBEDDING_DIM)
+    module_name, _, attr = settings.EMBEDDER.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def embedder_fingerprint(embedder) -> str:
+    # Vectors from different embedders (or dims) are not comparable
+    cls = type(embedder)
+    return f"{cls.__module__}:{cls.__qualname__}/{embedder.dim}"
+
+
+def task_text(title: str, description: Optional[str] = None) -> str:
+    return f"{title} {description or ''}".strip()
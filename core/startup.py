@@ -0,0 +1,138 @@
+# backend/core/startup.py
+"""
+Startup timing: per-module import cost and lifespan phase durations.
+
+Run `python -m core.startup` from the backend directory to print a report.
+The command exits non-zero when the measured boot time exceeds
+`settings.BOOT_TIME_BUDGET_MS` (or `--budget-ms`); tests/test_startup.py
+enforces the same budget under pytest.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       123 |       4567 |   package.module"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupTimer:
+    """Collects named phase durations (in milliseconds) during boot."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    def reset(self):
+        # Each lifespan reports only its own phases (TestClient runs several per process)
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.phases)
+
+    def report(self) -> str:
+        lines = [f"  {name:<32} {ms:>9.1f} ms" for name, ms in self.phases]
+        lines.append(f"  {'total':<32} {self.total_ms:>9.1f} ms")
+        return "Startup phases:\n" + "\n".join(lines)
+
+
+startup_timer = StartupTimer()
+
+
+def measure_import_times(module: str = "main") -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Import `module` in a fresh interpreter with `-X importtime`.
+    Returns (total_ms, [(module_name, cumulative_ms), ...]) for the modules
+    imported directly by the root, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module!r} failed:\n{result.stderr}")
+
+    total_ms = 0.0
+    top_level: List[Tuple[str, float]] = []
+    # importtime prints children before their parent, so buffer the nested
+    # entries and keep them once the root module's own line shows up.
+    pending: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        indent = len(match.group(3))
+        name = match.group(4)
+        if indent <= 1:
+            if name == module:
+                total_ms = cumulative_ms
+                top_level = pending
+            pending = []
+        elif indent == 3:
+            pending.append((name, cumulative_ms))
+
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total_ms, top_level
+
+
+async def run_lifespan(module: str = "main") -> StartupTimer:
+    """Run the app's lifespan once and return the phases it recorded."""
+    app_module = importlib.import_module(module)
+    # Under `python -m core.startup` this file is __main__; the app records
+    # into the `core.startup` copy it imported, so read the timer from there.
+    timer = importlib.import_module("core.startup").startup_timer
+    async with app_module.lifespan(app_module.app):
+        pass
+    run = StartupTimer()
+    run.phases = list(timer.phases)
+    return run
+
+
+def main(argv=None) -> int:
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Report cold start timings")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=settings.BOOT_TIME_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--skip-lifespan", action="store_true", help="Only measure imports (no database needed)")
+    args = parser.parse_args(argv)
+
+    import_ms, modules = measure_import_times(args.module)
+    print(f"Import of {args.module!r}: {import_ms:.1f} ms")
+    for name, ms in modules[: args.top]:
+        print(f"  {name:<40} {ms:>9.1f} ms")
+
+    boot_ms = import_ms
+    if not args.skip_lifespan:
+        timer = asyncio.run(run_lifespan(args.module))
+        boot_ms += timer.total_ms
+
+    print(f"Boot time: {boot_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if boot_ms > args.budget_ms:
+        print("Boot time budget exceeded!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
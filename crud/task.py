@@ -1,50 +1,83 @@
 # backend/crud/task.py
 from sqlmodel import Session, select
-from models.task import Task, Priority
+from models.task import Task, TaskArchive, Priority
 from schemas.task import TaskCreate, TaskUpdate
-from typing import List, Optional
+from typing import List, Optional, Union
+from sharding import ensure_writable
+from services.task_hooks import on_tasks_removed, on_tasks_saved
 # Removed uuid import as task IDs are now integers
 
-def get_tasks(
-    session: Session,
-    user_id: int, # Changed to int
-    title: Optional[str] = None,
-    due_date: Optional[str] = None, # Expect YYYY-MM-DD
-    priority: Optional[Priority] = None
-) -> List[Task]:
-    statement = select(Task).where(Task.user_id == user_id)
+def _filter_tasks(statement, model, title: Optional[str], due_date: Optional[str], priority: Optional[Priority]):
     if title:
-        statement = statement.where(Task.title.ilike(f"%{title}%")) # Case-insensitive search
+        statement = statement.where(model.title.ilike(f"%{title}%")) # Case-insensitive search
     if due_date:
         # For date filtering, compare date parts. Assuming due_date in DB is datetime.
         # This will need careful handling depending on exact DB schema and desired comparison
-        statement = statement.where(Task.due_date == due_date) # Simplified for example
+        statement = statement.where(model.due_date == due_date) # Simplified for example
     if priority:
-        statement = statement.where(Task.priority == priority)
-        
-    return session.exec(statement).all()
+        statement = statement.where(model.priority == priority)
+    return statement
+
+def get_tasks(
+    session: Session,
+    user_id: int, # Changed to int
+    title: Optional[str] = None,
+    due_date: Optional[str] = None, # Expect YYYY-MM-DD
+    priority: Optional[Priority] = None,
+    include_archived: bool = False # Also read the cold task_archive tier
+) -> List[Union[Task, TaskArchive]]:
+    statement = _filter_tasks(select(Task).where(Task.user_id == user_id), Task, title, due_date, priority)
+    tasks = list(session.exec(statement).all())
+
+    if include_archived:
+        archived = _filter_tasks(
+            select(TaskArchive).where(TaskArchive.user_id == user_id), TaskArchive, title, due_date, priority
+        )
+        tasks.extend(session.exec(archived).all())
+
+    return tasks
 
 def create_task(session: Session, task_create: TaskCreate, user_id: int) -> Task: # Changed user_id to int
+    ensure_writable(session)
     # Task ID is auto-incremented integer, so no need to pass id explicitly
     db_task = Task(**task_create.model_dump(), user_id=user_id)
     session.add(db_task)
     session.commit()
     session.refresh(db_task)
+    on_tasks_saved(user_id, [db_task])
     return db_task
 
-def get_task_by_id(session: Session, task_id: int, user_id: int) -> Optional[Task]: # Changed task_id and user_id to int
+def get_task_by_id(
+    session: Session,
+    task_id: int, # Changed task_id and user_id to int
+    user_id: int,
+    include_archived: bool = False # Fall back to task_archive (ids are shared between tiers)
+) -> Optional[Union[Task, TaskArchive]]:
     statement = select(Task).where(Task.id == task_id, Task.user_id == user_id)
-    return session.exec(statement).first()
+    task = session.exec(statement).first()
+    if task is None and include_archived:
+        archived = select(TaskArchive).where(TaskArchive.id == task_id, TaskArchive.user_id == user_id)
+        task = session.exec(archived).first()
+    return task
 
-def update_task(session: Session, db_task: Task, task_update: TaskUpdate) -> Task:
+def update_task(session: Session, db_task: Union[Task, TaskArchive], task_update: TaskUpdate) -> Task:
+    ensure_writable(session)
+    if isinstance(db_task, TaskArchive):
+        # Editing an archived task moves it back into the hot table, keeping its id
+        session.delete(db_task)
+        db_task = Task(**db_task.model_dump(exclude={"archived_at"}))
     task_data = task_update.model_dump(exclude_unset=True)
     for key, value in task_data.items():
         setattr(db_task, key, value)
     session.add(db_task)
     session.commit()
     session.refresh(db_task)
+    on_tasks_saved(db_task.user_id, [db_task])
     return db_task
 
-def delete_task(session: Session, db_task: Task):
+def delete_task(session: Session, db_task: Union[Task, TaskArchive]):
+    ensure_writable(session)
+    user_id, task_id = db_task.user_id, db_task.id
     session.delete(db_task)
-    session.commit()
\ No newline at end of file
+    session.commit()
+    on_tasks_removed(user_id, [task_id])
@@ -1,12 +1,168 @@
 # backend/database.py
-from sqlmodel import create_engine, Session, SQLModel
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import create_engine, Session, SQLModel, select
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from config import settings
+from models.schema_version import SchemaVersion
+
+# Bump whenever a model change needs new tables/columns on existing databases
+SCHEMA_VERSION = 4
+
+def make_engine(url: str) -> Engine:
+    """
+    Build an engine from the pool settings in config.Settings.
+    SQLite picks its own pool class, so only pre-ping applies there.
+    """
+    kwargs: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if not url.startswith("sqlite"):
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return create_engine(url, **kwargs)
+
+# Primary takes all writes; reads go to the replica when one is configured
+engine = make_engine(settings.DATABASE_URL)
+read_engine = make_engine(settings.READ_REPLICA_URL) if settings.READ_REPLICA_URL else engine
+
+# -------------------------------
+# Read-your-writes
+# -------------------------------
+# A write pins its client to the primary for READ_YOUR_WRITES_SECONDS. The
+# pin (a wall-clock "primary until" timestamp) travels with the client as a
+# cookie, or as the same response header for non-browser clients to echo
+# back, so whichever worker or pod serves the next read can honour it.
+PRIMARY_UNTIL_COOKIE = "read_primary_until"
+PRIMARY_UNTIL_HEADER = "x-read-primary-until"
+
+def mark_recent_write(request: Optional[Request]):
+    if request is None or read_engine is engine:
+        return
+    request.state.read_primary_until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+
+def reads_from_primary(request: Request) -> bool:
+    raw = request.headers.get(PRIMARY_UNTIL_HEADER) or request.cookies.get(PRIMARY_UNTIL_COOKIE)
+    if not raw:
+        return False
+    try:
+        until = float(raw)
+    except ValueError:
+        return False
+    now = time.time()
+    # Pins further out than a write could set (plus clock skew) are ignored
+    return now < until <= now + 2 * settings.READ_YOUR_WRITES_SECONDS
+
+class ReadYourWritesMiddleware:
+    """Returns the pin set by mark_recent_write during the request to the client."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+        async def send_with_pin(message: Message):
+            if message["type"] == "http.response.start":
+                until = scope.get("state", {}).get("read_primary_until")
+                if until is not None:
+                    value = f"{until:.3f}"
+                    cookie = (
+                        f"{PRIMARY_UNTIL_COOKIE}={value}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    headers = list(message.get("headers", []))
+                    headers.append((PRIMARY_UNTIL_HEADER.encode(), value.encode()))
+                    headers.append((b"set-cookie", cookie.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+@event.listens_for(Session, "after_flush")
+def _flag_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_commit(session):
+    # Runs inside the handler, so the pin is set before the response starts
+    if session.info.pop("wrote", False):
+        mark_recent_write(session.info.get("request"))
+
+# -------------------------------
+# Schema
+# -------------------------------
+def get_schema_version() -> Optional[int]:
+    # Single indexed lookup; a missing table just means "never initialised"
+    try:
+        with Session(engine) as session:
+            return session.exec(select(SchemaVersion.version).order_by(SchemaVersion.version.desc())).first()
+    except SQLAlchemyError:
+        return None
+
+def create_db_and_tables() -> bool:
+    """
+    Create tables only when the database is not already at SCHEMA_VERSION.
+    Returns True if the schema was (re)applied, False if it was already current.
+    """
+    if get_schema_version() == SCHEMA_VERSION:
+        return False
 
-def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        if session.get(SchemaVersion, SCHEMA_VERSION) is None:
+            session.add(SchemaVersion(version=SCHEMA_VERSION))
+            session.commit()
+    return True
 
-def get_session():
+# -------------------------------
+# Session dependencies
+# -------------------------------
+def get_session(request: Request):
+    # Primary session for anything that may write
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        session.info["request"] = request
+        yield session
+
+def get_read_session(request: Request):
+    # Replica session for read-only dependencies, unless this client just wrote
+    pinned = read_engine is not engine and reads_from_primary(request)
+    with Session(engine if pinned else read_engine) as session:
+        session.info["pinned_to_primary"] = pinned  # lets caches skip entries this client may not see
+        yield session
+
+# -------------------------------
+# Pool stats
+# -------------------------------
+def engine_pool_stats(db_engine: Engine) -> Dict[str, Any]:
+    pool = db_engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__, "status": pool.status()}
+    if hasattr(pool, "checkedout"):
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        checked_out = pool.checkedout()
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=checked_out,
+            overflow=pool.overflow(),
+            saturation=round(checked_out / capacity, 3) if capacity else None,
+        )
+    return stats
+
+def get_pool_stats() -> Dict[str, Any]:
+    stats = {"primary": engine_pool_stats(engine)}
+    if read_engine is not engine:
+        stats["replica"] = engine_pool_stats(read_engine)
+    return stats
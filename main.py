@@ -2,16 +2,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import create_db_and_tables
+from config import settings
+from core.startup import startup_timer
+from database import create_db_and_tables, engine_pool_stats, get_pool_stats, ReadYourWritesMiddleware, SCHEMA_VERSION
 from routers import auth, tasks, chat
+from sharding import create_shard_tables, shard_engines, sharding_enabled
+from services.archival import archival_loop
+from services.admission import AdmissionControlMiddleware, admission_stats, default_admission_classes
+from services.idempotency import IdempotencyMiddleware
+import asyncio
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Creating tables...")
-    create_db_and_tables()
-    print("Tables created!")
+    startup_timer.reset()
+    if settings.AUTO_CREATE_SCHEMA:
+        with startup_timer.phase("lifespan:schema_check"):
+            applied = create_db_and_tables()
+        if applied:
+            print(f"Schema created/upgraded to version {SCHEMA_VERSION}")
+        else:
+            print(f"Schema already at version {SCHEMA_VERSION}")
+        if sharding_enabled():
+            # One table-list query per shard, so shards added since the last boot get their tables
+            with startup_timer.phase("lifespan:shard_schema"):
+                create_shard_tables()
+    archiver = asyncio.create_task(archival_loop()) if settings.ARCHIVE_ENABLED else None
+    print(startup_timer.report())
     yield
+    if archiver:
+        archiver.cancel()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -20,6 +40,16 @@ origins = [
     os.environ.get("FRONTEND_URL", "http://localhost:3000")
 ]
 
+# Middleware added later wraps earlier ones: CORS -> idempotency -> admission control -> read-your-writes.
+# Idempotent replays and duplicates waiting on an in-flight key never hold an admission slot.
+app.add_middleware(ReadYourWritesMiddleware)
+
+admission_classes = default_admission_classes()
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware, classes=admission_classes)
+
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -34,4 +64,15 @@ app.include_router(chat.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the AI-Powered Todo Application API"}
\ No newline at end of file
+    return {"message": "Welcome to the AI-Powered Todo Application API"}
+
+@app.get("/health/db-pool")
+def read_db_pool_stats():
+    stats = get_pool_stats()
+    if sharding_enabled():
+        stats["shards"] = [engine_pool_stats(shard_engine) for shard_engine in shard_engines]
+    return stats
+
+@app.get("/health/admission")
+def read_admission_stats():
+    return admission_stats(admission_classes)
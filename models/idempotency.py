@@ -0,0 +1,16 @@
+# backend/models/idempotency.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, LargeBinary, Text
+from sqlmodel import Field, SQLModel
+
+class IdempotencyRecord(SQLModel, table=True):
+    __tablename__ = "idempotency_record"
+
+    key: str = Field(primary_key=True)  # sha256 of client + method + path + Idempotency-Key
+    state: str = "pending"  # pending | done
+    status_code: Optional[int] = None
+    headers: Optional[str] = Field(default=None, sa_column=Column(Text))  # JSON list of [name, value]
+    body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    request_hash: Optional[str] = None  # sha256 of the original request body, replays must match it
+    expires_at: datetime = Field(index=True)
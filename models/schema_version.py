@@ -0,0 +1,9 @@
+# backend/models/schema_version.py
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+
+    version: int = Field(primary_key=True)
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
@@ -18,4 +18,22 @@ class Task(SQLModel, table=True):
     enable_reminder: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: int = Field(foreign_key="user.id")
-    owner: "User" = Relationship(back_populates="tasks")
\ No newline at end of file
+    owner: "User" = Relationship(back_populates="tasks")
+
+class TaskArchive(SQLModel, table=True):
+    # Cold tier: tasks moved out of `task` by services/archival.py, ids preserved
+    __tablename__ = "task_archive"
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str
+    description: Optional[str] = None
+    priority: Priority = Priority.MEDIUM
+    due_date: Optional[datetime] = None
+    enable_reminder: bool = False
+    created_at: datetime
+    user_id: int = Field(index=True)
+    archived_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+    @property
+    def archived(self) -> bool:
+        return True
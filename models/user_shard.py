@@ -0,0 +1,9 @@
+# backend/models/user_shard.py
+from sqlmodel import Field, SQLModel
+
+class UserShard(SQLModel, table=True):
+    __tablename__ = "user_shard"
+
+    user_id: int = Field(primary_key=True)
+    shard: int
+    locked: bool = False  # set while the user's tasks are being moved between shards
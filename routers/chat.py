@@ -3,22 +3,29 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
-import google.genai as genai  # Official SDK
-
 from services.auth import get_current_user
 from models.user import User
 from models.task import Task
 from config import settings
 from sqlmodel import Session
-from database import get_session
+from sharding import get_shard_session, ensure_writable
+from services.task_hooks import on_tasks_saved
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-# Initialize Gemini client
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+# Gemini client, created on first use so importing this router stays cheap
+_client: Optional[Any] = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        import google.genai as genai  # Official SDK (heavy import, deferred)
+        _client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    return _client
 
 # Conversation sessions per user
 conversation_sessions: Dict[str, Any] = {}
@@ -41,7 +48,7 @@ class ChatMessageResponse(BaseModel):
 @router.post("/", response_model=ChatMessageResponse)
 async def chat_with_ai(
     *,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_shard_session),
     request: ChatMessageRequest,
     current_user: User = Depends(get_current_user)
 ):
@@ -50,7 +57,7 @@ async def chat_with_ai(
     try:
         # --- Create or reuse chat session ---
         if user_id not in conversation_sessions:
-            chat_session = client.chats.create(model="gemini-2.5-flash")
+            chat_session = get_client().chats.create(model="gemini-2.5-flash")
             conversation_sessions[user_id] = chat_session
         else:
             chat_session = conversation_sessions[user_id]
@@ -81,6 +88,7 @@ async def chat_with_ai(
                 task_data["priority"] = priority
 
                 # --- All data collected, save to DB ---
+                ensure_writable(session)
                 ai_task = Task(
                     title=task_data["title"][:100],
                     description=task_data["description"][:500],
@@ -93,6 +101,7 @@ async def chat_with_ai(
                 session.add(ai_task)
                 session.commit()
                 session.refresh(ai_task)
+                on_tasks_saved(current_user.id, [ai_task])
 
                 # Clear task creation session
                 del task_creation_sessions[user_id]
@@ -115,6 +124,8 @@ async def chat_with_ai(
 
         return ChatMessageResponse(reply=reply_text)
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1,13 +1,15 @@
 # backend/routers/tasks.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 from typing import List, Optional
 from datetime import datetime
 
-from database import get_session
+from sharding import ensure_writable, get_shard_session, get_shard_read_session
 from crud.task import create_task, get_tasks, get_task_by_id, update_task, delete_task
-from schemas.task import TaskCreate, TaskUpdate, TaskResponse, Priority
+from schemas.task import TaskCreate, TaskUpdate, TaskResponse, SemanticSearchResult, AgendaItem, Priority
 from services.auth import get_current_user
+from services.task_io import EXPORT_FORMATS, import_tasks, stream_import_progress, stream_tasks_export
 from models.user import User
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_new_task(
     *, 
-    session: Session = Depends(get_session), 
+    session: Session = Depends(get_shard_session), 
     task_create: TaskCreate, 
     current_user: User = Depends(get_current_user)
 ):
@@ -29,23 +31,88 @@ def create_new_task(
 @router.get("/", response_model=List[TaskResponse])
 def read_tasks(
     *, 
-    session: Session = Depends(get_session), 
+    session: Session = Depends(get_shard_read_session), 
     current_user: User = Depends(get_current_user),
     title: Optional[str] = Query(None, description="Filter tasks by title"),
     due_date: Optional[str] = Query(None, description="Filter tasks by due date (YYYY-MM-DD)"),
-    priority: Optional[Priority] = Query(None, description="Filter tasks by priority")
+    priority: Optional[Priority] = Query(None, description="Filter tasks by priority"),
+    include_archived: bool = Query(False, description="Also return archived (long past due) tasks")
 ):
-    tasks = get_tasks(session, user_id=current_user.id, title=title, due_date=due_date, priority=priority)
+    tasks = get_tasks(
+        session,
+        user_id=current_user.id,
+        title=title,
+        due_date=due_date,
+        priority=priority,
+        include_archived=include_archived,
+    )
     return tasks
 
+@router.get("/agenda", response_model=List[AgendaItem])
+def read_agenda(
+    *,
+    session: Session = Depends(get_shard_read_session),
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(10, ge=1, le=200, description="Number of tasks to return")
+):
+    from services.agenda import top_agenda  # numpy loaded on first use
+
+    ranked = top_agenda(session, current_user.id, limit=limit)
+    return [{"task": task, "score": score, "overdue": overdue} for task, score, overdue in ranked]
+
+@router.get("/search/semantic", response_model=List[SemanticSearchResult])
+def search_tasks_semantic(
+    *,
+    session: Session = Depends(get_shard_read_session),
+    current_user: User = Depends(get_current_user),
+    q: str = Query(..., min_length=1, description="What the tasks are about"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results")
+):
+    from services.semantic_index import semantic_search  # numpy loaded on first use
+
+    hits = semantic_search(session, current_user.id, q, k=limit)
+    return [{"task": task, "score": score} for task, score in hits]
+
+@router.get("/export")
+def export_tasks(
+    *,
+    current_user: User = Depends(get_current_user),
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    include_archived: bool = Query(False, description="Also export archived tasks")
+):
+    return StreamingResponse(
+        stream_tasks_export(current_user.id, fmt, include_archived=include_archived),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{fmt}"'},
+    )
+
+@router.post("/import")
+def import_tasks_file(
+    *,
+    session: Session = Depends(get_shard_session),
+    current_user: User = Depends(get_current_user),
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="Defaults to the file extension"),
+    progress: bool = Query(False, description="Stream NDJSON progress after each batch instead of one summary")
+):
+    fmt = fmt or ("csv" if (file.filename or "").lower().endswith(".csv") else "ndjson")
+    ensure_writable(session)
+    if progress:
+        # The session and upload stay open until the streamed response ends
+        return StreamingResponse(
+            stream_import_progress(session, current_user.id, file.file, fmt),
+            media_type=EXPORT_FORMATS["ndjson"],
+        )
+    return import_tasks(session, current_user.id, file.file, fmt)
+
 @router.get("/{task_id}", response_model=TaskResponse)
 def read_task(
     *, 
-    session: Session = Depends(get_session), 
+    session: Session = Depends(get_shard_read_session), 
     task_id: int, 
     current_user: User = Depends(get_current_user)
 ):
-    task = get_task_by_id(session, task_id, user_id=current_user.id)
+    task = get_task_by_id(session, task_id, user_id=current_user.id, include_archived=True)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     return task
@@ -53,12 +120,12 @@ def read_task(
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_existing_task(
     *, 
-    session: Session = Depends(get_session), 
+    session: Session = Depends(get_shard_session), 
     task_id: int, 
     task_update: TaskUpdate, 
     current_user: User = Depends(get_current_user)
 ):
-    db_task = get_task_by_id(session, task_id, user_id=current_user.id)
+    db_task = get_task_by_id(session, task_id, user_id=current_user.id, include_archived=True)
     if not db_task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     
@@ -72,11 +139,11 @@ def update_existing_task(
 @router.delete("/{task_id}", status_code=status.HTTP_200_OK)
 def delete_existing_task(
     *, 
-    session: Session = Depends(get_session), 
+    session: Session = Depends(get_shard_session), 
     task_id: int, 
     current_user: User = Depends(get_current_user)
 ):
-    db_task = get_task_by_id(session, task_id, user_id=current_user.id)
+    db_task = get_task_by_id(session, task_id, user_id=current_user.id, include_archived=True)
     if not db_task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     
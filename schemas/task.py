@@ -21,10 +21,24 @@ class TaskUpdate(TaskBase):
     due_date: Optional[datetime] = None
     enable_reminder: Optional[bool] = None
 
+class TaskImportRow(TaskBase):
+    # One line of a bulk import; created_at is kept when migrating accounts
+    created_at: Optional[datetime] = None
+
 class TaskResponse(TaskBase):
     id: int
     user_id: int
     created_at: datetime
+    archived: bool = False # True for tasks read from task_archive
 
     class Config:
-        from_attributes = True # for SQLModel
\ No newline at end of file
+        from_attributes = True # for SQLModel
+
+class SemanticSearchResult(BaseModel):
+    task: TaskResponse
+    score: float # Cosine similarity, higher is closer
+
+class AgendaItem(BaseModel):
+    task: TaskResponse
+    score: float
+    overdue: bool
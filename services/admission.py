@@ -0,0 +1,207 @@
+# backend/services/admission.py
+"""
+Admission control: keep cheap task CRUD fast while slow paths are throttled.
+
+Requests are sorted into classes by path prefix (chat, auth, bulk, tasks).
+Each class has its own concurrency limit and bounded wait queue, so a
+pile-up of Gemini calls or long exports/imports cannot starve task CRUD or
+/auth. Before queueing, the expected
+wait is estimated from the queue depth and the class's recent service time;
+if it would exceed the class's latency target the request is turned away
+immediately (503), as is anything arriving at a full queue (429). Both carry
+Retry-After. Time already spent in an upstream proxy queue (X-Request-Start)
+counts against the target.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+
+_EWMA_ALPHA = 0.2
+
+
+class AdmissionClass:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, target_ms: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.target_ms = target_ms
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.avg_service_ms = 0.0
+        self.avg_queue_ms = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self.waiters if not waiter.done())
+
+    def estimated_wait_ms(self) -> float:
+        if self.active < self.max_concurrency and not self.queued:
+            return 0.0
+        # Everyone ahead of us, plus us, drains max_concurrency at a time
+        return (self.queued + 1) * self.avg_service_ms / self.max_concurrency
+
+    async def acquire(self, timeout_ms: float) -> bool:
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout_ms / 1000)
+            return True  # release() handed its slot to us
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the timeout fired
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot we were handed but will not use
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter.cancelled():
+                try:
+                    self.waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self):
+        # Hand the slot straight to the next live waiter, otherwise free it
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def record(self, queue_ms: float, service_ms: float):
+        self.admitted += 1
+        self.avg_queue_ms += _EWMA_ALPHA * (queue_ms - self.avg_queue_ms)
+        self.avg_service_ms += _EWMA_ALPHA * (service_ms - self.avg_service_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "target_ms": self.target_ms,
+            "avg_queue_ms": round(self.avg_queue_ms, 1),
+            "avg_service_ms": round(self.avg_service_ms, 1),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+BULK_TASK_PATHS = ("/tasks/export", "/tasks/import", "/tasks/search/semantic")
+
+
+def default_admission_classes() -> List[Tuple[str, AdmissionClass]]:
+    # (path prefix, class), first match wins; paths matching none of these are not throttled
+    bulk = AdmissionClass(
+        "bulk", settings.ADMISSION_BULK_CONCURRENCY, settings.ADMISSION_BULK_QUEUE, settings.ADMISSION_BULK_TARGET_MS
+    )
+    return [
+        ("/chat", AdmissionClass(
+            "chat", settings.ADMISSION_CHAT_CONCURRENCY, settings.ADMISSION_CHAT_QUEUE, settings.ADMISSION_CHAT_TARGET_MS
+        )),
+        ("/auth", AdmissionClass(
+            "auth", settings.ADMISSION_AUTH_CONCURRENCY, settings.ADMISSION_AUTH_QUEUE, settings.ADMISSION_AUTH_TARGET_MS
+        )),
+        *[(prefix, bulk) for prefix in BULK_TASK_PATHS],
+        ("/tasks", AdmissionClass(
+            "tasks", settings.ADMISSION_TASKS_CONCURRENCY, settings.ADMISSION_TASKS_QUEUE, settings.ADMISSION_TASKS_TARGET_MS
+        )),
+    ]
+
+
+def admission_stats(classes: List[Tuple[str, AdmissionClass]]) -> Dict[str, Any]:
+    # Several prefixes may share one class
+    return {admission_class.name: admission_class.stats() for _, admission_class in classes}
+
+
+def _upstream_queue_ms(scope: Scope) -> float:
+    # X-Request-Start: "t=<epoch seconds|ms|us>" as set by nginx / Heroku routers
+    raw = dict(scope["headers"]).get(b"x-request-start")
+    if not raw:
+        return 0.0
+    try:
+        value = float(raw.decode("latin-1").strip().removeprefix("t="))
+    except ValueError:
+        return 0.0
+    while value > 1e11:  # normalise ms / us to seconds
+        value /= 1000
+    return max(0.0, (time.time() - value) * 1000)
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, classes: Optional[List[Tuple[str, AdmissionClass]]] = None):
+        self.app = app
+        self.classes = classes if classes is not None else default_admission_classes()
+
+    def _classify(self, path: str) -> Optional[AdmissionClass]:
+        for prefix, admission_class in self.classes:
+            if path.startswith(prefix):
+                return admission_class
+        return None
+
+    async def _reject(self, send: Send, status_code: int, retry_after_ms: float, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(max(1, math.ceil(retry_after_ms / 1000))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        admission_class = self._classify(scope["path"]) if scope["type"] == "http" else None
+        if admission_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        budget_ms = admission_class.target_ms - _upstream_queue_ms(scope)
+        estimate_ms = admission_class.estimated_wait_ms()
+
+        if admission_class.queued >= admission_class.max_queue:
+            admission_class.rejected += 1
+            await self._reject(send, 429, estimate_ms, f"Too many queued {admission_class.name} requests")
+            return
+        if estimate_ms > budget_ms:
+            admission_class.rejected += 1
+            await self._reject(send, 503, estimate_ms, "Server is busy, please retry shortly")
+            return
+
+        queued_at = time.perf_counter()
+        if not await admission_class.acquire(max(budget_ms, 0.0)):
+            admission_class.rejected += 1
+            await self._reject(send, 503, admission_class.estimated_wait_ms(), "Server is busy, please retry shortly")
+            return
+
+        started_at = time.perf_counter()
+        queue_ms = (started_at - queued_at) * 1000
+
+        async def send_with_queue_time(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-queue-time-ms", f"{queue_ms:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_queue_time)
+        finally:
+            admission_class.release()
+            admission_class.record(queue_ms, (time.perf_counter() - started_at) * 1000)
@@ -0,0 +1,162 @@
+# backend/services/agenda.py
+"""
+"What should I do next": rank a user's open tasks in one vectorized pass.
+
+A user's tasks are loaded once into columnar NumPy arrays (id, priority,
+due timestamp, created timestamp) and cached until a task write for that
+user invalidates them. Scoring is elementwise over those arrays and the top
+N are picked with argpartition, so only N rows are ever sorted.
+
+Every row in the hot `task` table counts as open (there is no completed
+flag; archived tasks live in task_archive and are not ranked).
+
+Reads pinned to the primary after a write (see database.reads_from_primary)
+bypass the cache, so the writer always ranks its own new tasks. Columns
+loaded from the read replica may lag, so they are only cached for
+READ_YOUR_WRITES_SECONDS.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from config import settings
+from database import engine, read_engine
+from models.task import Priority, Task
+
+PRIORITY_LEVELS = {Priority.LOW: 0.0, Priority.MEDIUM: 0.5, Priority.HIGH: 1.0}
+
+
+class TaskColumns:
+    def __init__(self, ids: np.ndarray, priority: np.ndarray, due_ts: np.ndarray, created_ts: np.ndarray):
+        self.ids = ids
+        self.priority = priority
+        self.due_ts = due_ts  # NaN when the task has no due date
+        self.created_ts = created_ts
+        self.loaded_at = time.monotonic()
+        self.max_age = settings.AGENDA_CACHE_TTL_SECONDS
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return math.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # naive datetimes are stored as UTC
+    return value.timestamp()
+
+
+def load_task_columns(session: Session, user_id: int) -> TaskColumns:
+    rows = session.exec(
+        select(Task.id, Task.priority, Task.due_date, Task.created_at)
+        .where(Task.user_id == user_id)
+    ).all()
+    count = len(rows)
+    return TaskColumns(
+        ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+        priority=np.fromiter((PRIORITY_LEVELS.get(row[1], 0.5) for row in rows), dtype=np.float32, count=count),
+        due_ts=np.fromiter((_timestamp(row[2]) for row in rows), dtype=np.float64, count=count),
+        created_ts=np.fromiter((_timestamp(row[3]) for row in rows), dtype=np.float64, count=count),
+    )
+
+
+# -------------------------------
+# Per-user column cache
+# -------------------------------
+_columns: "OrderedDict[int, TaskColumns]" = OrderedDict()
+# user_id -> (generation, monotonic time) of the last invalidation, oldest first
+_invalidations: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+_generation = 0
+_lock = threading.Lock()
+
+# Invalidations are only needed while a load that started before them can still
+# finish; this is far longer than any load, so older entries are dropped.
+_INVALIDATION_HORIZON_SECONDS = 300
+
+
+def invalidate_agenda(user_id: int):
+    global _generation
+    now = time.monotonic()
+    with _lock:
+        _columns.pop(user_id, None)
+        # A new generation stops an in-flight load from caching pre-write data
+        _generation += 1
+        _invalidations[user_id] = (_generation, now)
+        _invalidations.move_to_end(user_id)
+        horizon = now - max(_INVALIDATION_HORIZON_SECONDS, settings.READ_YOUR_WRITES_SECONDS)
+        while _invalidations and next(iter(_invalidations.values()))[1] < horizon:
+            _invalidations.popitem(last=False)
+
+
+def get_task_columns(session: Session, user_id: int) -> TaskColumns:
+    with _lock:
+        columns = _columns.get(user_id)
+        fresh_enough = columns is not None and time.monotonic() - columns.loaded_at < columns.max_age
+        if fresh_enough and not session.info.get("pinned_to_primary"):
+            _columns.move_to_end(user_id)
+            return columns
+        generation = _generation
+
+    columns = load_task_columns(session, user_id)
+    if read_engine is not engine and session.get_bind() is read_engine:
+        # The replica may not have the latest write yet; don't trust this copy for long
+        columns.max_age = min(columns.max_age, settings.READ_YOUR_WRITES_SECONDS)
+
+    with _lock:
+        invalidation = _invalidations.get(user_id)
+        if invalidation is None or invalidation[0] <= generation:
+            _columns[user_id] = columns
+            _columns.move_to_end(user_id)
+            while len(_columns) > settings.AGENDA_CACHE_SIZE:
+                _columns.popitem(last=False)
+    return columns
+
+
+# -------------------------------
+# Scoring
+# -------------------------------
+def score_tasks(columns: TaskColumns, now: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (scores, overdue_mask) for every task in `columns`."""
+    has_due = ~np.isnan(columns.due_ts)
+    hours_until_due = np.where(has_due, (columns.due_ts - now) / 3600, np.inf)
+    overdue = hours_until_due < 0
+
+    # Upcoming tasks: 1.0 when due now, halving every AGENDA_DUE_HALF_LIFE_HOURS
+    decay = math.log(2) / settings.AGENDA_DUE_HALF_LIFE_HOURS
+    due_soon = np.where(overdue | ~has_due, 0.0, np.exp(-decay * np.maximum(hours_until_due, 0.0)))
+
+    age_days = (now - columns.created_ts) / 86400
+    age = np.clip(np.nan_to_num(age_days) / settings.AGENDA_AGE_SATURATION_DAYS, 0.0, 1.0)
+
+    scores = (
+        settings.AGENDA_WEIGHT_PRIORITY * columns.priority
+        + settings.AGENDA_WEIGHT_DUE * due_soon
+        + settings.AGENDA_WEIGHT_OVERDUE * overdue
+        + settings.AGENDA_WEIGHT_AGE * age
+    )
+    return scores, overdue
+
+
+def top_agenda(session: Session, user_id: int, limit: int = 10) -> List[Tuple[Task, float, bool]]:
+    """The `limit` highest scoring tasks as (task, score, overdue), best first."""
+    columns = get_task_columns(session, user_id)
+    if not columns.ids.size:
+        return []
+
+    scores, overdue = score_tasks(columns, time.time())
+    k = min(limit, scores.size)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+
+    top_ids = [int(task_id) for task_id in columns.ids[top]]
+    tasks = session.exec(select(Task).where(Task.user_id == user_id, Task.id.in_(top_ids))).all()
+    by_id = {task.id: task for task in tasks}
+    return [
+        (by_id[task_id], float(scores[row]), bool(overdue[row]))
+        for task_id, row in zip(top_ids, top)
+        if task_id in by_id
+    ]
@@ -0,0 +1,152 @@
+# backend/services/archival.py
+"""
+Background archival: keeps the hot `task` table small by moving tasks whose
+due date is long past into `task_archive`, in throttled batches.
+
+Archived rows keep their ids and are still returned by list/search calls
+made with include_archived=True and by id lookups (flagged `archived`;
+editing one moves it back into `task`). ARCHIVE_RETENTION_DAYS optionally purges
+the archive itself.
+
+Every worker runs the loop, but on Postgres a pass only proceeds in the
+worker holding a session advisory lock on the primary; batches are also
+selected FOR UPDATE SKIP LOCKED, so overlapping passes never pick the
+same rows. Other databases have no such lock: enable ARCHIVE_ENABLED on a
+single worker there.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import delete, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, select
+
+from config import settings
+from database import engine
+from models.task import Task, TaskArchive
+from models.user_shard import UserShard
+from services.task_hooks import on_tasks_removed
+from sharding import shard_engines, sharding_enabled
+
+ARCHIVER_LOCK_KEY = 0x7A5C_A4C1  # pg advisory lock key, shared by every worker
+
+
+def _task_engines() -> List[Engine]:
+    return list(shard_engines) if sharding_enabled() else [engine]
+
+
+def _locked_user_ids() -> Set[int]:
+    # Users mid shard-migration are left alone until the move completes
+    if not sharding_enabled():
+        return set()
+    with Session(engine) as session:
+        return set(session.exec(select(UserShard.user_id).where(UserShard.locked == True)).all())  # noqa: E712
+
+
+def _acquire_runner_lock() -> Optional[Connection]:
+    """
+    Returns the connection holding the archiver lock, or None if another
+    worker holds it. Non-Postgres primaries get a lock-free connection.
+    """
+    conn = engine.connect()
+    if engine.dialect.name != "postgresql":
+        return conn
+    if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVER_LOCK_KEY}).scalar():
+        conn.commit()
+        return conn
+    conn.close()
+    return None
+
+
+def _release_runner_lock(conn: Connection):
+    try:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVER_LOCK_KEY})
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def archive_batch(db_engine: Engine, cutoff: datetime, skip_users: Set[int]) -> int:
+    """Move one batch of tasks due before `cutoff`; returns the number moved."""
+    statement = select(Task).where(Task.due_date < cutoff)
+    if skip_users:
+        statement = statement.where(Task.user_id.not_in(skip_users))
+    statement = statement.order_by(Task.id).limit(settings.ARCHIVE_BATCH_SIZE).with_for_update(skip_locked=True)
+
+    with Session(db_engine) as session:
+        tasks = session.exec(statement).all()
+        if not tasks:
+            return 0
+        now = datetime.utcnow()
+        moved: Dict[int, List[int]] = {}
+        for task in tasks:
+            session.add(TaskArchive(**task.model_dump(), archived_at=now))
+            moved.setdefault(task.user_id, []).append(task.id)
+            session.delete(task)
+        # Insert + delete commit together, so a task is never in both tiers
+        session.commit()
+
+    for user_id, task_ids in moved.items():
+        on_tasks_removed(user_id, task_ids, only_open=True)
+    return len(tasks)
+
+
+def purge_batch(db_engine: Engine, cutoff: datetime) -> int:
+    """Delete one batch of archived tasks archived before `cutoff`."""
+    with Session(db_engine) as session:
+        ids = session.exec(
+            select(TaskArchive.id).where(TaskArchive.archived_at < cutoff).limit(settings.ARCHIVE_BATCH_SIZE)
+        ).all()
+        if not ids:
+            return 0
+        session.exec(delete(TaskArchive).where(TaskArchive.id.in_(ids)))
+        session.commit()
+        return len(ids)
+
+
+async def run_archival_pass() -> int:
+    """Archive (and purge) everything eligible right now; returns tasks archived."""
+    runner_lock = await asyncio.to_thread(_acquire_runner_lock)
+    if runner_lock is None:
+        return 0  # another worker is archiving
+    try:
+        return await _archive_all()
+    finally:
+        await asyncio.to_thread(_release_runner_lock, runner_lock)
+
+
+async def _archive_all() -> int:
+    now = datetime.utcnow()
+    archive_cutoff = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    skip_users = await asyncio.to_thread(_locked_user_ids)
+    archived = 0
+
+    for db_engine in _task_engines():
+        while True:
+            moved = await asyncio.to_thread(archive_batch, db_engine, archive_cutoff, skip_users)
+            archived += moved
+            if moved < settings.ARCHIVE_BATCH_SIZE:
+                break
+            await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+
+        if settings.ARCHIVE_RETENTION_DAYS > 0:
+            purge_cutoff = now - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+            while await asyncio.to_thread(purge_batch, db_engine, purge_cutoff) >= settings.ARCHIVE_BATCH_SIZE:
+                await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+
+    return archived
+
+
+async def archival_loop():
+    # Started from main.lifespan when ARCHIVE_ENABLED is set
+    while True:
+        try:
+            archived = await run_archival_pass()
+            if archived:
+                print(f"Archived {archived} past-due tasks")
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
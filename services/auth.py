@@ -8,7 +8,7 @@ from sqlmodel import Session
 from config import settings
 from crud.user import get_user_by_email
 from models.user import User
-from database import get_session
+from database import engine, get_read_session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -22,7 +22,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_read_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,6 +36,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     except JWTError:
         raise credentials_exception
     user = get_user_by_email(session, email)
+    if user is None and session.get_bind() is not engine:
+        # Replica may not have the row yet (e.g. just registered): confirm on the primary
+        with Session(engine) as primary_session:
+            user = get_user_by_email(primary_session, email)
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,285 @@
+# backend/services/idempotency.py
+"""
+Idempotency-Key support for retried writes.
+
+The first request carrying a given key runs normally and its response is
+stored for IDEMPOTENCY_TTL_SECONDS. Retries get the stored response back
+(with `Idempotent-Replayed: true`) without touching the database or Gemini.
+A duplicate that arrives while the first is still running waits for it.
+5xx and 429 responses are not stored, so a failed or shed request can
+really be retried.
+
+The request body is hashed as it streams through; reusing a key with a
+different body gets a 422 instead of the unrelated stored response.
+Multipart bodies are not compared (their boundary changes per attempt).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+from database import engine
+from models.idempotency import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# (status_code, headers, body, request_hash)
+StoredResponse = Tuple[int, List[List[str]], bytes, Optional[str]]
+
+_POLL_INITIAL_SECONDS = 0.05
+_POLL_MAX_SECONDS = 1.0
+
+
+# -------------------------------
+# Stores
+# -------------------------------
+class MemoryIdempotencyStore:
+    """Per-process store; fine for a single worker or sticky load balancing."""
+
+    blocking = False
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+    def _prune(self, now: float):
+        for key in [k for k, record in self._records.items() if record["expires_at"] <= now]:
+            del self._records[key]
+
+    def reserve(self, key: str) -> Tuple[bool, Optional[StoredResponse]]:
+        """Claim `key`. Returns (claimed, stored_response_if_done)."""
+        now = time.monotonic()
+        with self._lock:
+            record = self._records.get(key)
+            if record is None or record["expires_at"] <= now:
+                if len(self._records) > 10_000:
+                    self._prune(now)
+                self._records[key] = {"response": None, "expires_at": now + settings.IDEMPOTENCY_LOCK_SECONDS}
+                return True, None
+            return False, record["response"]
+
+    def complete(self, key: str, response: StoredResponse):
+        with self._lock:
+            self._records[key] = {"response": response, "expires_at": time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS}
+
+    def release(self, key: str):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class DatabaseIdempotencyStore:
+    """Shared across workers through the idempotency_record table on the primary."""
+
+    blocking = True
+
+    def reserve(self, key: str) -> Tuple[bool, Optional[StoredResponse]]:
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            record = session.get(IdempotencyRecord, key)
+            if record is not None and record.expires_at <= now:
+                session.delete(record)
+                session.commit()
+                record = None
+            if record is not None:
+                if record.state != "done":
+                    return False, None
+                return False, (record.status_code, json.loads(record.headers or "[]"), record.body or b"", record.request_hash)
+
+            session.add(IdempotencyRecord(
+                key=key,
+                state="pending",
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Lost the race to a concurrent duplicate
+                session.rollback()
+                return False, None
+            return True, None
+
+    def complete(self, key: str, response: StoredResponse):
+        status_code, headers, body, request_hash = response
+        with Session(engine) as session:
+            record = session.get(IdempotencyRecord, key) or IdempotencyRecord(key=key, expires_at=datetime.utcnow())
+            record.state = "done"
+            record.status_code = status_code
+            record.headers = json.dumps(headers)
+            record.body = body
+            record.request_hash = request_hash
+            record.expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            session.add(record)
+            session.commit()
+
+    def release(self, key: str):
+        with Session(engine) as session:
+            record = session.get(IdempotencyRecord, key)
+            if record is not None:
+                session.delete(record)
+                session.commit()
+
+
+def get_idempotency_store():
+    if settings.IDEMPOTENCY_STORE == "database":
+        return DatabaseIdempotencyStore()
+    return MemoryIdempotencyStore()
+
+
+# -------------------------------
+# Middleware
+# -------------------------------
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp, store=None, paths: Optional[List[str]] = None):
+        self.app = app
+        self.store = store or get_idempotency_store()
+        self.paths = tuple(paths if paths is not None else settings.IDEMPOTENCY_PATHS)
+        # Keys claimed by this worker; same-worker duplicates wait on the event instead of polling
+        self._in_flight: Dict[str, asyncio.Event] = {}
+
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    def _scoped_key(self, scope: Scope, client_key: bytes) -> str:
+        # Scope keys per caller and endpoint so clients cannot collide with each other
+        headers = dict(scope["headers"])
+        parts = [headers.get(b"authorization", b""), scope["method"].encode(), scope["path"].encode(), client_key]
+        return hashlib.sha256(b"\0".join(parts)).hexdigest()
+
+    async def _replay(self, send: Send, response: StoredResponse):
+        status_code, headers, body, _ = response
+        raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        raw_headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _error(self, send: Send, status_code: int, detail: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")] + (headers or []),
+        })
+        await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+    async def _conflict(self, send: Send):
+        await self._error(send, 409, "A request with this Idempotency-Key is still in progress", [(b"retry-after", b"1")])
+
+    async def _wait_for_first(self, key: str) -> Tuple[bool, Optional[StoredResponse]]:
+        """Poll until the in-flight request for `key` finishes; (False, None) on timeout."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = _POLL_INITIAL_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, None
+            event = self._in_flight.get(key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False, None
+            else:
+                # Claimed by another worker: back off exponentially
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, _POLL_MAX_SECONDS)
+            claimed, stored = await self._call(self.store.reserve, key)
+            if claimed or stored is not None:
+                return claimed, stored
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        client_key = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if not client_key:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._scoped_key(scope, client_key)
+        headers = dict(scope["headers"])
+        compare_body = not headers.get(b"content-type", b"").startswith(b"multipart/")
+        claimed, stored = await self._call(self.store.reserve, key)
+
+        # Duplicate of an in-flight request: wait for the first one to finish
+        if not claimed and stored is None:
+            claimed, stored = await self._wait_for_first(key)
+            if not claimed and stored is None:
+                await self._conflict(send)
+                return
+
+        if stored is not None:
+            stored_hash = stored[3]
+            if compare_body and stored_hash is not None:
+                request_hash = await _read_body_hash(receive)
+                if request_hash != stored_hash:
+                    await self._error(send, 422, "Idempotency-Key was already used with a different request body")
+                    return
+            await self._replay(send, stored)
+            return
+
+        event = self._in_flight[key] = asyncio.Event()
+        hasher = hashlib.sha256()
+        body_complete = False
+        status_code = 500
+        response_headers: List[List[str]] = []
+        body_parts: List[bytes] = []
+
+        async def hashing_receive() -> Message:
+            nonlocal body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                hasher.update(message.get("body", b""))
+                body_complete = not message.get("more_body", False)
+            return message
+
+        async def capture_send(message: Message):
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            try:
+                await self.app(scope, hashing_receive, capture_send)
+            except BaseException:
+                await self._call(self.store.release, key)
+                raise
+
+            if status_code < 500 and status_code != 429:
+                # Hash whatever the handler did not read (e.g. rejected before parsing the body)
+                while compare_body and not body_complete:
+                    if (await hashing_receive())["type"] != "http.request":
+                        break
+                request_hash = hasher.hexdigest() if compare_body and body_complete else None
+                await self._call(self.store.complete, key, (status_code, response_headers, b"".join(body_parts), request_hash))
+            else:
+                await self._call(self.store.release, key)
+        finally:
+            self._in_flight.pop(key, None)
+            event.set()
+
+
+async def _read_body_hash(receive: Receive) -> str:
+    hasher = hashlib.sha256()
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        hasher.update(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return hasher.hexdigest()
@@ -0,0 +1,313 @@
+# backend/services/semantic_index.py
+"""
+Per-user semantic index over task titles and descriptions.
+
+Each user gets a contiguous float32 matrix (one row per task) memory-mapped
+from SEMANTIC_INDEX_DIR, plus a parallel int64 array of task ids and a small
+JSON header. Writes update rows in place (deletes swap the last row into the
+hole), so the matrix stays dense and top-k cosine search is a single
+matrix-vector product followed by argpartition.
+
+Indexes are built lazily from the database on a user's first search; task
+writes only touch indexes that already exist. The header records which
+embedder produced the vectors, and each search compares the index's row
+count and highest id with the user's tasks on the primary: an index from
+another embedder, or one that missed writes, is rebuilt (from the primary,
+never from a lagging replica).
+
+Every read or write of a user's files holds an flock on a sidecar `.lock`
+file (shared for search, exclusive for updates), so workers sharing
+SEMANTIC_INDEX_DIR never interleave a refresh with another's save. Where
+fcntl is unavailable (Windows) the lock is per-process only: run a single
+worker there.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from config import settings
+from core.embeddings import embedder_fingerprint, get_embedder, task_text
+from database import engine, read_engine
+from models.task import Task
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class UserIndex:
+    def __init__(self, directory: str, user_id: int, dim: int, fingerprint: str = ""):
+        self.dim = dim
+        self.fingerprint = fingerprint
+        base = os.path.join(directory, str(user_id))
+        self.meta_path = base + ".json"
+        self.vectors_path = base + ".vec"
+        self.ids_path = base + ".ids"
+        self.lock_path = base + ".lock"
+        self.lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        with self.locked(exclusive=False):
+            self._load()
+
+    @contextmanager
+    def locked(self, exclusive: bool = True):
+        """
+        Thread + cross-process lock. Re-entrant within a process; the flock is
+        taken by the outermost caller, so nested calls inherit its mode.
+        """
+        with self.lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                # The lock file is never replaced or deleted, unlike the index files
+                self._lock_file = open(self.lock_path, "a+")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # -------------------------------
+    # Files
+    # -------------------------------
+    def _load(self):
+        self.size = 0
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self.ids: Optional[np.memmap] = None
+        self._meta_mtime = None
+        self._rows: Dict[int, int] = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim or meta.get("embedder", "") != self.fingerprint:
+                return  # written by another embedder: treated as missing, rebuilt on the next search
+            if meta["capacity"]:
+                self.size = meta["size"]
+                self.capacity = meta["capacity"]
+                self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+                self.ids = np.memmap(self.ids_path, dtype=np.int64, mode="r+", shape=(self.capacity,))
+                self._rows = {int(task_id): row for row, task_id in enumerate(self.ids[: self.size])}
+            self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+
+    def _refresh(self):
+        # Another worker may have rewritten the index since we opened it
+        try:
+            mtime = os.stat(self.meta_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._meta_mtime:
+            self._load()
+
+    def _save(self):
+        self.vectors.flush()
+        self.ids.flush()
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": self.size, "capacity": self.capacity, "dim": self.dim, "embedder": self.fingerprint}, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_mtime = os.stat(self.meta_path).st_mtime_ns
+
+    def _grow(self, needed: int):
+        capacity = max(64, self.capacity * 2, needed)
+        vectors = np.memmap(self.vectors_path + ".tmp", dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        ids = np.memmap(self.ids_path + ".tmp", dtype=np.int64, mode="w+", shape=(capacity,))
+        if self.size:
+            vectors[: self.size] = self.vectors[: self.size]
+            ids[: self.size] = self.ids[: self.size]
+        vectors.flush()
+        ids.flush()
+        # Drop every mapping of the old files before replacing them (required on Windows)
+        del vectors, ids
+        self.vectors = self.ids = None
+        os.replace(self.vectors_path + ".tmp", self.vectors_path)
+        os.replace(self.ids_path + ".tmp", self.ids_path)
+        self.capacity = capacity
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.ids = np.memmap(self.ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    @property
+    def exists(self) -> bool:
+        return self._meta_mtime is not None
+
+    def stats(self) -> Tuple[int, int]:
+        """(row count, highest task id), compared with the database to spot missed writes."""
+        with self.locked(exclusive=False):
+            self._refresh()
+            if not self.size:
+                return 0, 0
+            return self.size, int(self.ids[: self.size].max())
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
+    def upsert(self, task_ids: List[int], vectors: np.ndarray):
+        with self.locked():
+            self._refresh()
+            new = [i for i, task_id in enumerate(task_ids) if task_id not in self._rows]
+            if self.size + len(new) > self.capacity:
+                self._grow(self.size + len(new))
+
+            for i, task_id in enumerate(task_ids):
+                row = self._rows.get(task_id)
+                if row is None:
+                    row = self.size
+                    self.size += 1
+                    self._rows[task_id] = row
+                    self.ids[row] = task_id
+                self.vectors[row] = vectors[i]
+            self._save()
+
+    def remove(self, task_ids: Iterable[int]):
+        with self.locked():
+            self._refresh()
+            if not self.exists:
+                return
+            for task_id in task_ids:
+                row = self._rows.pop(task_id, None)
+                if row is None:
+                    continue
+                last = self.size - 1
+                if row != last:
+                    # Keep the matrix dense: move the last row into the hole
+                    self.vectors[row] = self.vectors[last]
+                    moved_id = int(self.ids[last])
+                    self.ids[row] = moved_id
+                    self._rows[moved_id] = row
+                self.size = last
+            self._save()
+
+    def delete_files(self):
+        with self.locked():
+            self.vectors = self.ids = None
+            for path in (self.meta_path, self.vectors_path, self.ids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._load()
+
+    # -------------------------------
+    # Search
+    # -------------------------------
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        with self.locked(exclusive=False):
+            self._refresh()
+            if not self.size:
+                return []
+            scores = self.vectors[: self.size] @ query  # rows are unit vectors -> cosine
+            k = min(k, self.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self.ids[row]), float(scores[row])) for row in top]
+
+
+# -------------------------------
+# Open index cache
+# -------------------------------
+_indexes: "OrderedDict[int, UserIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_user_index(user_id: int) -> UserIndex:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            os.makedirs(settings.SEMANTIC_INDEX_DIR, exist_ok=True)
+            embedder = get_embedder()
+            index = UserIndex(settings.SEMANTIC_INDEX_DIR, user_id, embedder.dim, embedder_fingerprint(embedder))
+            _indexes[user_id] = index
+            if len(_indexes) > settings.SEMANTIC_INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(user_id)
+        return index
+
+
+def index_tasks(user_id: int, tasks: List[Task]):
+    """Embed and store `tasks`; a no-op until the user's index has been built."""
+    index = get_user_index(user_id)
+    if not index.exists or not tasks:
+        return
+    vectors = get_embedder().embed([task_text(task.title, task.description) for task in tasks])
+    index.upsert([task.id for task in tasks], vectors)
+
+
+def remove_tasks(user_id: int, task_ids: List[int], only_open: bool = False):
+    if only_open:
+        # Don't open (and map) cold indexes; search already skips ids missing from the database
+        with _indexes_lock:
+            index = _indexes.get(user_id)
+        if index is not None:
+            index.remove(task_ids)
+        return
+    get_user_index(user_id).remove(task_ids)
+
+
+def invalidate_user_index(user_id: int):
+    # Dropped indexes are rebuilt from the database on the next search
+    get_user_index(user_id).delete_files()
+
+
+def build_user_index(session: Session, user_id: int, batch_size: int = 1000) -> UserIndex:
+    index = get_user_index(user_id)
+    embedder = get_embedder()
+    statement = (
+        select(Task.id, Task.title, Task.description)
+        .where(Task.user_id == user_id)
+        .execution_options(yield_per=batch_size)
+    )
+    with index.locked():
+        index.delete_files()
+        index._grow(0)
+        batch: List[Tuple[int, str, Optional[str]]] = []
+        for row in session.exec(statement):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                index.upsert([r[0] for r in batch], embedder.embed([task_text(r[1], r[2]) for r in batch]))
+                batch = []
+        if batch:
+            index.upsert([r[0] for r in batch], embedder.embed([task_text(r[1], r[2]) for r in batch]))
+        else:
+            index._save()
+    return index
+
+
+@contextmanager
+def _primary_session(session: Session):
+    # The index must match the primary; a lagging replica would make it look stale
+    if read_engine is not engine and session.get_bind() is read_engine:
+        with Session(engine) as primary:
+            yield primary
+    else:
+        yield session
+
+
+def semantic_search(session: Session, user_id: int, query: str, k: int = 10) -> List[Tuple[Task, float]]:
+    """Top-k tasks by cosine similarity to `query`, best first."""
+    index = get_user_index(user_id)
+    with _primary_session(session) as primary:
+        count, max_id = primary.exec(
+            select(func.count(), func.max(Task.id)).where(Task.user_id == user_id)
+        ).one()
+        if not index.exists or index.stats() != (count, max_id or 0):
+            index = build_user_index(primary, user_id)
+
+        hits = index.search(get_embedder().embed([query])[0], k)
+        if not hits:
+            return []
+
+        tasks = primary.exec(select(Task).where(Task.user_id == user_id, Task.id.in_([task_id for task_id, _ in hits]))).all()
+    by_id = {task.id: task for task in tasks}
+    # Skip ids whose rows were deleted by another worker since the last refresh
+    return [(by_id[task_id], score) for task_id, score in hits if task_id in by_id]
@@ -0,0 +1,235 @@
+# backend/services/shard_migration.py
+"""
+Move one user's tasks to another shard while the API keeps serving them.
+
+  1. Copy all rows to the target in batches (reads and writes continue).
+  2. Lock the user's placement so task writes return 503, wait for in-flight
+     writes, then re-sync: re-copy every batch and drop rows deleted meanwhile.
+     On a Postgres primary the lock UPDATE itself waits for in-flight writes
+     (they share-lock the placement row, see sharding.ensure_writable);
+     elsewhere SHARD_MIGRATION_GRACE_SECONDS is slept instead.
+  3. Point the placement at the target, unlock, delete the source rows.
+
+Both the hot `task` table and `task_archive` are moved.
+Tasks have no updated_at column, so the re-sync in step 2 walks every row
+again; the lock is held for roughly one batched pass over the user's tasks.
+
+--from-primary moves every user that still has tasks in the primary
+database (data written before sharding was enabled) onto their placement
+shard. That shard is already live for the user and may hold tasks written
+since, so it is a merge, not a mirror: the user's writes are locked for the
+whole copy, rows are only added (never pruned), and an id that exists on
+both sides with different contents aborts the move instead of overwriting.
+
+Usage: python -m services.shard_migration --user-id 42 --to 1
+       python -m services.shard_migration --from-primary
+"""
+import argparse
+import sys
+import time
+from typing import List, Set
+
+from sqlalchemy import delete, select, union
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from config import settings
+from database import engine
+from models.task import Task, TaskArchive
+from models.user_shard import UserShard
+from sharding import create_shard_tables, get_user_shard, shard_engines, sharding_enabled
+
+task_tables = [Task.__table__, TaskArchive.__table__]
+
+
+def _set_placement(user_id: int, shard: int, locked: bool):
+    with Session(engine) as session:
+        placement = session.get(UserShard, user_id) or UserShard(user_id=user_id, shard=shard)
+        placement.shard = shard
+        placement.locked = locked
+        session.add(placement)
+        session.commit()
+
+
+def _wait_for_in_flight_writes():
+    # Postgres: the locking UPDATE in _set_placement already waited on every writer's share lock
+    if engine.dialect.name != "postgresql":
+        time.sleep(settings.SHARD_MIGRATION_GRACE_SECONDS)
+
+
+def _copy_rows(task_table, user_id: int, source: Engine, target: Engine) -> Set[int]:
+    """Idempotently copy the user's rows in id order; returns the ids copied."""
+    batch_size = settings.SHARD_MIGRATION_BATCH_SIZE
+    copied: Set[int] = set()
+    last_id = 0
+    while True:
+        with source.connect() as conn:
+            rows = conn.execute(
+                select(task_table)
+                .where(task_table.c.user_id == user_id, task_table.c.id > last_id)
+                .order_by(task_table.c.id)
+                .limit(batch_size)
+            ).mappings().all()
+        if not rows:
+            return copied
+
+        batch: List[dict] = [dict(row) for row in rows]
+        ids = [row["id"] for row in batch]
+        with target.begin() as conn:
+            # Delete-then-insert makes re-runs pick up updates to copied rows
+            conn.execute(delete(task_table).where(task_table.c.user_id == user_id, task_table.c.id.in_(ids)))
+            conn.execute(task_table.insert(), batch)
+
+        copied.update(ids)
+        last_id = ids[-1]
+
+
+def _prune_rows(task_table, user_id: int, target: Engine, keep: Set[int]):
+    # Drop rows that were deleted on the source after the first pass
+    with target.begin() as conn:
+        target_ids = conn.execute(select(task_table.c.id).where(task_table.c.user_id == user_id)).scalars().all()
+        stale = [task_id for task_id in target_ids if task_id not in keep]
+        for start in range(0, len(stale), settings.SHARD_MIGRATION_BATCH_SIZE):
+            chunk = stale[start:start + settings.SHARD_MIGRATION_BATCH_SIZE]
+            conn.execute(delete(task_table).where(task_table.c.id.in_(chunk)))
+
+
+def _delete_source_rows(task_table, user_id: int, source: Engine):
+    batch_size = settings.SHARD_MIGRATION_BATCH_SIZE
+    while True:
+        with source.begin() as conn:
+            ids = conn.execute(
+                select(task_table.c.id).where(task_table.c.user_id == user_id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return
+            conn.execute(delete(task_table).where(task_table.c.id.in_(ids)))
+
+
+def _move_rows(user_id: int, source: Engine, target: Engine, source_shard: int, target_shard: int) -> int:
+    # Phase 1: bulk copy while the user stays live on the source
+    for task_table in task_tables:
+        _copy_rows(task_table, user_id, source, target)
+
+    # Phase 2: freeze writes, then bring the target fully up to date
+    _set_placement(user_id, source_shard, locked=True)
+    try:
+        _wait_for_in_flight_writes()
+        moved = 0
+        for task_table in task_tables:
+            copied = _copy_rows(task_table, user_id, source, target)
+            _prune_rows(task_table, user_id, target, keep=copied)
+            moved += len(copied)
+    except Exception:
+        _set_placement(user_id, source_shard, locked=False)
+        raise
+
+    # Phase 3: switch over, then clean up the source
+    _set_placement(user_id, target_shard, locked=False)
+    for task_table in task_tables:
+        _delete_source_rows(task_table, user_id, source)
+    return moved
+
+
+def _require_sharding():
+    if not sharding_enabled():
+        raise RuntimeError("Sharding is not configured (TASK_SHARD_URLS is empty)")
+
+
+def move_user_tasks(user_id: int, target: int) -> int:
+    """Move all of `user_id`'s tasks to shard `target`; returns the row count moved."""
+    _require_sharding()
+    if not 0 <= target < len(shard_engines):
+        raise ValueError(f"Unknown shard {target}; configured shards: 0..{len(shard_engines) - 1}")
+
+    source = get_user_shard(user_id).shard
+    if source == target:
+        return 0
+
+    create_shard_tables(target)
+    return _move_rows(user_id, shard_engines[source], shard_engines[target], source, target)
+
+
+def _primary_task_users() -> List[int]:
+    statement = union(*[select(task_table.c.user_id) for task_table in task_tables])
+    with engine.connect() as conn:
+        return sorted(conn.execute(statement).scalars().all())
+
+
+def _merge_rows(task_table, user_id: int, target: Engine) -> int:
+    """
+    Add the user's primary rows to `target` without touching rows that
+    originated there. Re-runs skip rows already copied; returns rows added.
+    """
+    batch_size = settings.SHARD_MIGRATION_BATCH_SIZE
+    added = 0
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(task_table)
+                .where(task_table.c.user_id == user_id, task_table.c.id > last_id)
+                .order_by(task_table.c.id)
+                .limit(batch_size)
+            ).mappings().all()
+        if not rows:
+            return added
+
+        batch = {row["id"]: dict(row) for row in rows}
+        with target.begin() as conn:
+            existing = conn.execute(select(task_table).where(task_table.c.id.in_(list(batch)))).mappings().all()
+            for row in existing:
+                if dict(row) != batch[row["id"]]:
+                    raise RuntimeError(
+                        f"{task_table.name} id {row['id']} exists on the primary and on the shard with different "
+                        f"contents (user {user_id}); resolve it by hand before re-running"
+                    )
+                del batch[row["id"]]  # copied by an earlier, interrupted run
+            if batch:
+                conn.execute(task_table.insert(), list(batch.values()))
+        added += len(batch)
+        last_id = rows[-1]["id"]
+
+
+def move_unsharded_tasks() -> int:
+    """Merge every task still stored in the primary database into its user's shard."""
+    _require_sharding()
+    create_shard_tables()  # also raises shard id sequences above the primary's ids
+
+    moved = 0
+    for user_id in _primary_task_users():
+        target = get_user_shard(user_id).shard  # pins the placement if the user had none
+        _set_placement(user_id, target, locked=True)
+        try:
+            _wait_for_in_flight_writes()
+            count = sum(_merge_rows(task_table, user_id, shard_engines[target]) for task_table in task_tables)
+        finally:
+            _set_placement(user_id, target, locked=False)
+        for task_table in task_tables:
+            _delete_source_rows(task_table, user_id, engine)
+        print(f"User {user_id}: moved {count} tasks from the primary to shard {target}")
+        moved += count
+    return moved
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move a user's tasks to another shard")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--to", type=int, dest="target")
+    parser.add_argument("--from-primary", action="store_true", help="move all unsharded tasks onto their shards")
+    args = parser.parse_args(argv)
+
+    if args.from_primary:
+        moved = move_unsharded_tasks()
+        print(f"Moved {moved} tasks from the primary database")
+        return 0
+    if args.user_id is None or args.target is None:
+        parser.error("--user-id and --to are required unless --from-primary is given")
+
+    moved = move_user_tasks(args.user_id, args.target)
+    print(f"Moved {moved} tasks for user {args.user_id} to shard {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# backend/services/task_hooks.py
+"""
+Keep derived per-user data (semantic index, agenda columns) in step with task writes.
+
+Called after the database commit, so failures are logged and swallowed:
+the indexes can always be rebuilt from the task table.
+"""
+import sys
+import traceback
+from typing import List
+
+from models.task import Task
+
+
+def _invalidate_agenda(user_id: int):
+    try:
+        from services.agenda import invalidate_agenda
+        invalidate_agenda(user_id)
+    except Exception:
+        traceback.print_exc()
+
+
+def on_tasks_saved(user_id: int, tasks: List[Task]):
+    _invalidate_agenda(user_id)
+    try:
+        from services.semantic_index import index_tasks  # numpy stays off the boot path
+        index_tasks(user_id, tasks)
+    except Exception:
+        traceback.print_exc()
+
+
+def on_tasks_removed(user_id: int, task_ids: List[int], only_open: bool = False):
+    # only_open: background jobs skip users whose index this process has not opened
+    _invalidate_agenda(user_id)
+    if only_open and "services.semantic_index" not in sys.modules:
+        return
+    try:
+        from services.semantic_index import remove_tasks
+        remove_tasks(user_id, task_ids, only_open=only_open)
+    except Exception:
+        traceback.print_exc()
+
+
+def on_tasks_bulk_changed(user_id: int):
+    # Bulk paths (import) don't know the new ids; drop the index and rebuild lazily
+    _invalidate_agenda(user_id)
+    try:
+        from services.semantic_index import invalidate_user_index
+        invalidate_user_index(user_id)
+    except Exception:
+        traceback.print_exc()
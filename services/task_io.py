@@ -0,0 +1,251 @@
+# backend/services/task_io.py
+"""
+Bulk export / import of a user's tasks.
+
+Export streams rows from a server-side cursor (yield_per), so memory stays
+flat regardless of account size. Import reads the uploaded file line by line
+and inserts fixed-size batches: COPY on Postgres, executemany elsewhere.
+Progress after each batch can be streamed back to the client as NDJSON.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, IO, Iterator, List, Set
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlmodel import Session
+
+from config import settings
+from models.task import Task, TaskArchive
+from schemas.task import TaskImportRow
+from services.task_hooks import on_tasks_bulk_changed
+from sharding import ensure_writable, shard_session
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+EXPORT_FIELDS = ["id", "title", "description", "priority", "due_date", "enable_reminder", "created_at", "user_id"]
+IMPORT_COLUMNS = ["title", "description", "priority", "due_date", "enable_reminder", "created_at", "user_id"]
+
+_FLUSH_BYTES = 64 * 1024
+
+
+# -------------------------------
+# Export
+# -------------------------------
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Priority enum
+        return value.value
+    return value
+
+
+def _iter_rows(session: Session, user_id: int, include_archived: bool) -> Iterator[Dict[str, Any]]:
+    tables = [Task.__table__, TaskArchive.__table__] if include_archived else [Task.__table__]
+    for table in tables:
+        statement = (
+            select(*[table.c[field] for field in EXPORT_FIELDS])
+            .where(table.c.user_id == user_id)
+            .order_by(table.c.id)
+            .execution_options(yield_per=settings.EXPORT_FETCH_SIZE)  # server-side cursor
+        )
+        for row in session.execute(statement).mappings():
+            yield {field: _export_value(row[field]) for field in EXPORT_FIELDS}
+
+
+def stream_tasks_export(user_id: int, fmt: str, include_archived: bool = False) -> Iterator[str]:
+    """Yield the export in ~64KB text chunks. Owns its session so it outlives the request handler."""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+
+    with shard_session(user_id) as session:
+        for row in _iter_rows(session, user_id, include_archived):
+            if writer:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+            if buffer.tell() >= _FLUSH_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# -------------------------------
+# Import
+# -------------------------------
+class _DecodedLines:
+    """
+    Decodes an upload line by line, so one bad byte sequence only costs its
+    own line. Tracks how many lines were consumed and which failed to decode.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.line_number = 0
+        self.bad_lines: Set[int] = set()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        raw = next(self.file)
+        self.line_number += 1
+        if self.line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            self.bad_lines.add(self.line_number)
+            return raw.decode("utf-8", errors="replace")
+
+
+def _iter_records(file: IO[bytes], fmt: str) -> Iterator[tuple]:
+    """Yield (line_number, record_dict_or_exception) without reading the whole file."""
+    lines = _DecodedLines(file)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        while True:
+            first_line = lines.line_number + 1
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield lines.line_number, ValueError(f"Malformed CSV: {e}")
+                continue
+            if lines.bad_lines.intersection(range(first_line, lines.line_number + 1)):
+                yield lines.line_number, ValueError("Line is not valid UTF-8")
+                continue
+            # Empty CSV cells mean "not set"
+            yield lines.line_number, {key: (value if value != "" else None) for key, value in record.items()}
+
+    for line in lines:
+        if lines.line_number in lines.bad_lines:
+            yield lines.line_number, ValueError("Line is not valid UTF-8")
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield lines.line_number, json.loads(line)
+        except ValueError as e:
+            yield lines.line_number, e
+
+
+def _copy_batch(session: Session, rows: List[Dict[str, Any]]):
+    # Postgres COPY: one round trip per batch; Enum columns store member names
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row["title"],
+            row["description"],
+            row["priority"].name,
+            row["due_date"].isoformat() if row["due_date"] else None,
+            row["enable_reminder"],
+            row["created_at"].isoformat(),
+            row["user_id"],
+        ])
+    buffer.seek(0)
+    cursor = session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY task ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _insert_batch(session: Session, rows: List[Dict[str, Any]]):
+    ensure_writable(session)  # re-checked per batch: a shard migration may have started meanwhile
+    if session.get_bind().dialect.name == "postgresql":
+        _copy_batch(session, rows)
+    else:
+        session.execute(insert(Task.__table__), rows)  # executemany
+    session.info["wrote"] = True  # Core inserts skip the flush hook used for read-your-writes
+    session.commit()
+
+
+def _iter_import(session: Session, user_id: int, file: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Validate each line as a TaskImportRow and insert valid rows in batches of
+    IMPORT_BATCH_SIZE. Bad lines are skipped and reported with their line number.
+
+    Yields the running counts after every full batch, then the final summary.
+    """
+    batch: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    imported = failed = batches = 0
+
+    try:
+        for line_number, record in _iter_records(file, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                row = TaskImportRow.model_validate(record)
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                if len(errors) < settings.IMPORT_MAX_ERRORS:
+                    message = "; ".join(err["msg"] for err in e.errors()) if isinstance(e, ValidationError) else str(e)
+                    errors.append({"line": line_number, "error": message})
+                continue
+
+            batch.append({
+                "title": row.title,
+                "description": row.description,
+                "priority": row.priority,
+                "due_date": row.due_date,
+                "enable_reminder": row.enable_reminder,
+                "created_at": row.created_at or datetime.utcnow(),
+                "user_id": user_id,
+            })
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                _insert_batch(session, batch)
+                imported += len(batch)
+                batches += 1
+                batch = []
+                yield {"imported": imported, "failed": failed, "batches": batches}
+
+        if batch:
+            _insert_batch(session, batch)
+            imported += len(batch)
+            batches += 1
+    finally:
+        # Also after an aborted import: the batches already committed stay
+        if imported:
+            on_tasks_bulk_changed(user_id)
+    yield {"imported": imported, "failed": failed, "batches": batches, "errors": errors, "done": True}
+
+
+def import_tasks(session: Session, user_id: int, file: IO[bytes], fmt: str) -> Dict[str, Any]:
+    """Run the whole import and return its summary."""
+    summary: Dict[str, Any] = {}
+    for summary in _iter_import(session, user_id, file, fmt):
+        pass
+    summary.pop("done")
+    return summary
+
+
+def stream_import_progress(session: Session, user_id: int, file: IO[bytes], fmt: str) -> Iterator[str]:
+    """
+    NDJSON progress lines for a running import: counts after each batch, then
+    the summary (`"done": true`). A migration starting mid-import ends the
+    stream with an `error` line; batches sent before it are kept.
+    """
+    progress: Dict[str, Any] = {"imported": 0, "failed": 0, "batches": 0}
+    try:
+        for progress in _iter_import(session, user_id, file, fmt):
+            yield json.dumps(progress) + "\n"
+    except HTTPException as e:
+        yield json.dumps({**progress, "error": e.detail}) + "\n"
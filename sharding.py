@@ -0,0 +1,180 @@
+# backend/sharding.py
+"""
+Optional horizontal sharding of the task table, keyed by user_id.
+
+With TASK_SHARD_URLS empty every helper here falls back to the primary
+database, so callers can use the shard-aware dependencies unconditionally.
+Shard placement lives in the `user_shard` table on the primary. A user's
+first access stores `user_id % len(shards)` there, so adding shards later
+never silently moves existing users.
+
+Shards must be Postgres: disjoint per-shard id sequences, all starting
+above the primary's task ids, are what let rows move between shards (and
+out of the primary) without id clashes.
+
+Task writes call ensure_writable(), which share-locks the user's placement
+row on the primary until the shard transaction ends. A migration's
+UPDATE of that row therefore waits for in-flight writes, and later writes
+see the lock and get a 503.
+"""
+from contextlib import contextmanager
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import MetaData, event, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from config import settings
+from database import engine, get_read_session, get_session, make_engine
+from models.task import Task, TaskArchive
+from models.user import User
+from models.user_shard import UserShard
+from services.auth import get_current_user
+
+shard_engines: List[Engine] = [make_engine(url) for url in settings.TASK_SHARD_URLS]
+
+for _index, _shard_engine in enumerate(shard_engines):
+    if _shard_engine.dialect.name != "postgresql" and not settings.SHARD_ALLOW_NON_POSTGRES:
+        raise RuntimeError(
+            f"TASK_SHARD_URLS[{_index}] uses {_shard_engine.dialect.name}; task shards must be Postgres "
+            "(set SHARD_ALLOW_NON_POSTGRES only for local testing)"
+        )
+
+def sharding_enabled() -> bool:
+    return bool(shard_engines)
+
+# -------------------------------
+# Placement
+# -------------------------------
+def default_shard_for(user_id: int) -> int:
+    return user_id % len(shard_engines)
+
+def get_user_shard(user_id: int) -> UserShard:
+    # The first lookup pins the modulo default, later ones read the stored row
+    with Session(engine) as session:
+        placement = session.get(UserShard, user_id)
+        if placement is not None:
+            return placement
+        session.add(UserShard(user_id=user_id, shard=default_shard_for(user_id)))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another request placed this user first; theirs wins
+            session.rollback()
+        return session.get(UserShard, user_id, populate_existing=True)
+
+def ensure_writable(session: Session):
+    """
+    Reject task writes while the user's rows are being moved between shards.
+    Clients get a 503 and retry once the move has finished.
+
+    Call before every write transaction: the placement is re-read from the
+    primary and share-locked until the session commits or rolls back.
+    """
+    user_id = session.info.get("shard_user")
+    if user_id is None or "placement_guard" in session.info:
+        return  # unsharded, or already guarded for this transaction
+
+    guard = engine.connect()
+    placement = guard.execute(
+        select(UserShard.shard, UserShard.locked).where(UserShard.user_id == user_id).with_for_update(read=True)
+    ).first()
+    session.info["placement_guard"] = guard
+    if placement is None or placement.locked or placement.shard != session.info.get("shard"):
+        # Locked, or moved since this session was opened
+        _release_placement_guard(session)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tasks are being migrated, please retry shortly",
+            headers={"Retry-After": str(max(1, int(settings.SHARD_MIGRATION_GRACE_SECONDS)))},
+        )
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _release_placement_guard(session: Session):
+    guard = session.info.pop("placement_guard", None)
+    if guard is not None:
+        guard.rollback()
+        guard.close()
+
+@contextmanager
+def shard_session(user_id: int):
+    # Session bound to the shard that owns `user_id` (primary when unsharded)
+    if not sharding_enabled():
+        with Session(engine) as session:
+            yield session
+        return
+
+    placement = get_user_shard(user_id)
+    with Session(shard_engines[placement.shard]) as session:
+        session.info["shard"] = placement.shard
+        session.info["shard_user"] = user_id
+        try:
+            yield session
+        finally:
+            _release_placement_guard(session)
+
+# -------------------------------
+# Session dependencies
+# -------------------------------
+def get_shard_session(request: Request, current_user: User = Depends(get_current_user)):
+    if not sharding_enabled():
+        yield from get_session(request)
+        return
+    with shard_session(current_user.id) as session:
+        yield session
+
+def get_shard_read_session(request: Request, current_user: User = Depends(get_current_user)):
+    # Shards have no replicas; only the unsharded path benefits from read routing
+    if not sharding_enabled():
+        yield from get_read_session(request)
+        return
+    with shard_session(current_user.id) as session:
+        yield session
+
+# -------------------------------
+# Schema
+# -------------------------------
+def _shard_metadata() -> MetaData:
+    # Shards only hold tasks; the FK to user.id cannot be enforced there
+    metadata = MetaData()
+    for model in (Task, TaskArchive):
+        table = model.__table__.to_metadata(metadata)
+        for constraint in list(table.foreign_key_constraints):
+            table.constraints.discard(constraint)
+        for column in table.columns:
+            column.foreign_keys.clear()
+        # create_all resolves table.foreign_keys, which still holds the copied FK
+        table.foreign_keys.clear()
+    return metadata
+
+def _primary_max_task_id() -> int:
+    with engine.connect() as conn:
+        return max(
+            conn.execute(select(func.max(table.c.id))).scalar() or 0
+            for table in (Task.__table__, TaskArchive.__table__)
+        )
+
+def create_shard_tables(shard: Optional[int] = None):
+    """
+    Create the task tables on every shard (or just `shard`) that lacks them,
+    and keep each Postgres shard's id sequence inside its own range and above
+    every id in the primary (whose rows may later be moved onto the shards).
+    """
+    metadata = _shard_metadata()
+    targets = range(len(shard_engines)) if shard is None else [shard]
+    primary_max_id = _primary_max_task_id()
+    for index in targets:
+        shard_engine = shard_engines[index]
+        existing = set(inspect(shard_engine).get_table_names())
+        if not existing.issuperset(metadata.tables):
+            metadata.create_all(shard_engine)
+        if shard_engine.dialect.name == "postgresql":
+            floor = max(index * settings.SHARD_ID_STRIDE, primary_max_id)
+            with shard_engine.begin() as conn:
+                conn.execute(
+                    text("SELECT setval('task_id_seq', :floor) WHERE (SELECT last_value FROM task_id_seq) < :floor"),
+                    {"floor": floor},
+                )
@@ -0,0 +1,53 @@
+# backend/tests/conftest.py
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read at import time, so point everything at a throwaway
+# SQLite database before any app module is imported (env beats .env).
+TEST_DIR = tempfile.mkdtemp(prefix="todo-backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'app.db')}"
+os.environ["DB_ECHO"] = "false"
+os.environ["SEMANTIC_INDEX_DIR"] = os.path.join(TEST_DIR, "semantic_index")
+os.environ["TASK_SHARD_URLS"] = "[]"
+
+import uuid  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def lagging_replica(monkeypatch):
+    # An empty "replica" that never receives the primary's writes
+    import database
+    import main  # noqa: F401  registers every table on SQLModel.metadata
+    from sqlmodel import SQLModel
+
+    replica = database.make_engine(f"sqlite:///{os.path.join(TEST_DIR, f'replica-{uuid.uuid4().hex}.db')}")
+    SQLModel.metadata.create_all(replica)
+    monkeypatch.setattr(database, "read_engine", replica)
+    yield replica
+    replica.dispose()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client) -> dict:
+    # A freshly registered user, so tests never see each other's tasks
+    response = client.post(
+        "/auth/register",
+        json={"email": f"{uuid.uuid4().hex}@example.com", "password": "secret123"},
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,42 @@
+# backend/tests/test_admission.py
+import asyncio
+
+import httpx
+from starlette.responses import JSONResponse
+
+from services.admission import AdmissionClass, AdmissionControlMiddleware, default_admission_classes
+from services.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+
+
+def test_bulk_routes_have_their_own_class():
+    middleware = AdmissionControlMiddleware(None, classes=default_admission_classes())
+    assert middleware._classify("/tasks/export").name == "bulk"
+    assert middleware._classify("/tasks/import").name == "bulk"
+    assert middleware._classify("/tasks/search/semantic").name == "bulk"
+    assert middleware._classify("/tasks/").name == "tasks"
+    assert middleware._classify("/tasks/42").name == "tasks"
+
+
+def test_idempotent_duplicates_wait_outside_admission_slots():
+    async def slow_app(scope, receive, send):
+        await receive()
+        await asyncio.sleep(0.3)
+        await JSONResponse({"ok": True}, status_code=201)(scope, receive, send)
+
+    # One slot and a 50 ms target: a duplicate queued for that slot would be shed with a 503
+    tasks_class = AdmissionClass("tasks", max_concurrency=1, max_queue=4, target_ms=50)
+    admission = AdmissionControlMiddleware(slow_app, classes=[("/tasks", tasks_class)])
+    stack = IdempotencyMiddleware(admission, store=MemoryIdempotencyStore(), paths=["/tasks"])
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stack), base_url="http://test") as client:
+            headers = {"Idempotency-Key": "same"}
+            first = asyncio.create_task(client.post("/tasks", json={}, headers=headers))
+            await asyncio.sleep(0.05)
+            duplicate = await client.post("/tasks", json={}, headers=headers)
+            return await first, duplicate
+
+    first, duplicate = asyncio.run(run())
+    assert first.status_code == 201
+    assert duplicate.status_code == 201 and duplicate.headers["idempotent-replayed"] == "true"
+    assert tasks_class.admitted == 1 and tasks_class.rejected == 0
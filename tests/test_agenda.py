@@ -0,0 +1,76 @@
+# backend/tests/test_agenda.py
+import numpy as np
+from sqlmodel import Session
+
+from config import settings
+from services import agenda
+
+
+def test_writer_ranks_its_new_task_despite_a_lagging_replica(monkeypatch, lagging_replica, client, auth_headers):
+    monkeypatch.setattr(agenda, "read_engine", lagging_replica)
+    assert client.get("/tasks/agenda", headers=auth_headers).json() == []  # caches the empty replica view
+
+    created = client.post("/tasks/", json={"title": "File taxes", "priority": "High"}, headers=auth_headers)
+    ranked = client.get("/tasks/agenda", headers=auth_headers).json()  # pinned to the primary by the write
+
+    assert [item["task"]["id"] for item in ranked] == [created.json()["id"]]
+
+
+def test_replica_columns_are_cached_only_briefly(monkeypatch, lagging_replica):
+    monkeypatch.setattr(agenda, "read_engine", lagging_replica)
+    with Session(lagging_replica) as session:
+        columns = agenda.get_task_columns(session, user_id=424242)
+    assert columns.max_age == min(settings.AGENDA_CACHE_TTL_SECONDS, settings.READ_YOUR_WRITES_SECONDS)
+
+
+def test_invalidations_are_pruned(monkeypatch):
+    monkeypatch.setattr(agenda, "_INVALIDATION_HORIZON_SECONDS", 0)
+    monkeypatch.setattr(agenda.settings, "READ_YOUR_WRITES_SECONDS", 0)
+    for user_id in range(1000, 1100):
+        agenda.invalidate_agenda(user_id)
+    assert len(agenda._invalidations) <= 1
+
+
+NOW = 1_800_000_000.0
+HOUR = 3600.0
+
+
+def _columns() -> agenda.TaskColumns:
+    # 1: overdue High, 2: Medium due in 12h, 3: undated Low created 20 days ago
+    return agenda.TaskColumns(
+        ids=np.array([1, 2, 3], dtype=np.int64),
+        priority=np.array([1.0, 0.5, 0.0], dtype=np.float32),
+        due_ts=np.array([NOW - 24 * HOUR, NOW + 12 * HOUR, np.nan]),
+        created_ts=np.array([NOW - 24 * HOUR, NOW - 24 * HOUR, NOW - 480 * HOUR]),
+    )
+
+
+def _ranking() -> list:
+    scores, _ = agenda.score_tasks(_columns(), NOW)
+    return [int(i) for i in _columns().ids[np.argsort(-scores)]]
+
+
+def test_overdue_high_beats_upcoming_medium_beats_undated_low():
+    _, overdue = agenda.score_tasks(_columns(), NOW)
+    assert _ranking() == [1, 2, 3]
+    assert overdue.tolist() == [True, False, False]
+
+
+def test_weights_reorder_the_agenda(monkeypatch):
+    monkeypatch.setattr(settings, "AGENDA_WEIGHT_PRIORITY", 0.0)
+    monkeypatch.setattr(settings, "AGENDA_WEIGHT_OVERDUE", 0.0)
+    assert _ranking() == [2, 3, 1]
+
+    monkeypatch.setattr(settings, "AGENDA_WEIGHT_DUE", 0.0)
+    assert _ranking()[0] == 3  # age alone: the oldest task leads
+
+
+def test_limit_returns_exactly_the_top_k(client, auth_headers):
+    for priority in ("Low", "High", "Medium", "Low", "High"):
+        client.post("/tasks/", json={"title": priority, "priority": priority}, headers=auth_headers)
+
+    full = client.get("/tasks/agenda", params={"limit": 200}, headers=auth_headers).json()
+    top = client.get("/tasks/agenda", params={"limit": 2}, headers=auth_headers).json()
+    assert len(full) == 5
+    assert [item["task"]["id"] for item in top] == [item["task"]["id"] for item in full[:2]]
+    assert [item["task"]["priority"] for item in top] == ["High", "High"]
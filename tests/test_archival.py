@@ -0,0 +1,39 @@
+# backend/tests/test_archival.py
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from services.archival import run_archival_pass
+
+
+def _create_overdue(client: TestClient, headers: dict, title: str) -> int:
+    due = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    response = client.post("/tasks/", json={"title": title, "due_date": due}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_archived_tasks_stay_reachable_by_id(client, auth_headers):
+    task_id = _create_overdue(client, auth_headers, "Renew passport")
+    assert asyncio.run(run_archival_pass()) >= 1
+
+    assert client.get("/tasks/", headers=auth_headers).json() == []
+    read = client.get(f"/tasks/{task_id}", headers=auth_headers)
+    assert read.status_code == 200 and read.json()["archived"] is True
+
+    # Editing an archived task brings it back into the hot table
+    due = (datetime.utcnow() + timedelta(days=7)).isoformat()
+    updated = client.put(f"/tasks/{task_id}", json={"due_date": due}, headers=auth_headers)
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["id"] == task_id and updated.json()["archived"] is False
+    assert [task["id"] for task in client.get("/tasks/", headers=auth_headers).json()] == [task_id]
+
+
+def test_archived_tasks_can_be_deleted(client, auth_headers):
+    task_id = _create_overdue(client, auth_headers, "Old receipt")
+    asyncio.run(run_archival_pass())
+
+    assert client.delete(f"/tasks/{task_id}", headers=auth_headers).status_code == 200
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
+    assert client.get("/tasks/", params={"include_archived": True}, headers=auth_headers).json() == []
@@ -0,0 +1,47 @@
+# backend/tests/test_idempotency.py
+import asyncio
+import uuid
+
+import httpx
+from starlette.responses import JSONResponse
+
+from services.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+
+
+def test_replay_requires_the_same_body(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/tasks/", json={"title": "Buy milk"}, headers=headers)
+    replay = client.post("/tasks/", json={"title": "Buy milk"}, headers=headers)
+    reused = client.post("/tasks/", json={"title": "Sell car"}, headers=headers)
+
+    assert first.status_code == 201
+    assert replay.status_code == 201 and replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == first.json()
+    assert reused.status_code == 422
+
+
+def test_concurrent_duplicate_waits_for_the_first_request():
+    calls = 0
+
+    async def slow_app(scope, receive, send):
+        nonlocal calls
+        calls += 1
+        await receive()
+        await asyncio.sleep(0.3)
+        await JSONResponse({"call": calls}, status_code=201)(scope, receive, send)
+
+    middleware = IdempotencyMiddleware(slow_app, store=MemoryIdempotencyStore(), paths=["/"])
+
+    async def run():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "same"}
+            return await asyncio.gather(
+                client.post("/tasks", json={"title": "a"}, headers=headers),
+                client.post("/tasks", json={"title": "a"}, headers=headers),
+            )
+
+    first, second = asyncio.run(run())
+    assert calls == 1
+    assert first.json() == second.json() == {"call": 1}
+    assert {first.headers.get("idempotent-replayed"), second.headers.get("idempotent-replayed")} == {None, "true"}
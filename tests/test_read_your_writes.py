@@ -0,0 +1,52 @@
+# backend/tests/test_read_your_writes.py
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlmodel import Session
+
+import database
+from models.user import User
+
+
+def test_new_user_is_found_on_primary_when_replica_lags(lagging_replica, client, auth_headers):
+    response = client.get("/tasks/", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_write_is_visible_to_the_next_read(lagging_replica, client, auth_headers):
+    created = client.post("/tasks/", json={"title": "Pay rent"}, headers=auth_headers)
+    assert created.status_code in (200, 201), created.text
+    assert database.PRIMARY_UNTIL_COOKIE in client.cookies
+    listed = client.get("/tasks/", headers=auth_headers)
+    assert listed.status_code == 200, listed.text
+    assert [task["id"] for task in listed.json()] == [created.json()["id"]]
+
+
+def test_pin_travels_with_the_client_not_the_process(lagging_replica, client, auth_headers):
+    created = client.post("/tasks/", json={"title": "Call bank"}, headers=auth_headers)
+    pin = created.headers[database.PRIMARY_UNTIL_HEADER]
+    # Drop the cookie: nothing server-side remembers the write...
+    client.cookies.clear()
+    assert client.get("/tasks/", headers=auth_headers).json() == []
+    # ...but echoing the pin (as any worker would receive it) reads from the primary
+    echoed = client.get("/tasks/", headers={**auth_headers, database.PRIMARY_UNTIL_HEADER: pin})
+    assert [task["id"] for task in echoed.json()] == [created.json()["id"]]
+
+
+def test_pins_beyond_what_a_write_sets_are_ignored(lagging_replica, client, auth_headers):
+    client.post("/tasks/", json={"title": "Water plants"}, headers=auth_headers)
+    client.cookies.clear()
+    forged = str(time.time() + 3600)
+    response = client.get("/tasks/", headers={**auth_headers, database.PRIMARY_UNTIL_HEADER: forged})
+    assert response.json() == []
+
+
+def test_commit_pins_client_before_session_closes(lagging_replica):
+    request = SimpleNamespace(state=SimpleNamespace())
+    with Session(database.engine) as session:
+        session.info["request"] = request
+        session.add(User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x"))
+        session.commit()
+        # Dependency teardown runs after the response is sent; the pin must already be set
+        assert request.state.read_primary_until > time.time()
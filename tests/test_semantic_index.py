@@ -0,0 +1,91 @@
+# backend/tests/test_semantic_index.py
+import multiprocessing
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from database import engine
+from models.task import Task
+from services import semantic_index
+from services.semantic_index import UserIndex
+
+DIM = 16
+
+
+def _writer(directory: str, worker: int, count: int):
+    index = UserIndex(directory, user_id=1, dim=DIM)
+    rng = np.random.default_rng(worker)
+    for i in range(count):
+        vector = rng.random((1, DIM), dtype=np.float32)
+        index.upsert([worker * 1000 + i], vector / np.linalg.norm(vector))
+
+
+@pytest.mark.skipif(semantic_index.fcntl is None, reason="cross-process locking needs fcntl")
+def test_concurrent_writers_in_separate_processes_keep_every_row():
+    directory = tempfile.mkdtemp(prefix="semantic-index-")
+    UserIndex(directory, user_id=1, dim=DIM)._grow(0)  # start from an existing, empty index
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_writer, args=(directory, worker, 40)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    index = UserIndex(directory, user_id=1, dim=DIM)
+    expected = {worker * 1000 + i for worker in range(4) for i in range(40)}
+    assert index.size == len(expected)
+    assert {int(task_id) for task_id in index.ids[: index.size]} == expected
+
+
+def test_removal_from_background_jobs_skips_unopened_indexes(monkeypatch):
+    opened = []
+    monkeypatch.setattr(semantic_index, "get_user_index", lambda user_id: opened.append(user_id))
+    semantic_index.remove_tasks(987654, [1, 2], only_open=True)
+    assert opened == []
+
+
+def _search(client, headers, q: str):
+    response = client.get("/tasks/search/semantic", params={"q": q}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [hit["task"]["title"] for hit in response.json()]
+
+
+def test_search_ranks_matching_task_first_and_follows_writes(client, auth_headers):
+    for title in ("Buy groceries", "Dentist appointment", "Call mom"):
+        assert client.post("/tasks/", json={"title": title}, headers=auth_headers).status_code == 201
+    assert _search(client, auth_headers, "dentist")[0] == "Dentist appointment"
+
+    tasks = {task["title"]: task["id"] for task in client.get("/tasks/", headers=auth_headers).json()}
+    client.put(f"/tasks/{tasks['Call mom']}", json={"title": "Book dentist cleaning"}, headers=auth_headers)
+    client.delete(f"/tasks/{tasks['Dentist appointment']}", headers=auth_headers)
+
+    hits = _search(client, auth_headers, "dentist")
+    assert hits[0] == "Book dentist cleaning"
+    assert "Dentist appointment" not in hits and "Call mom" not in hits
+
+
+def test_search_rebuilds_an_index_that_missed_writes(client, auth_headers):
+    created = client.post("/tasks/", json={"title": "Water plants"}, headers=auth_headers).json()
+    assert _search(client, auth_headers, "plants") == ["Water plants"]
+
+    # Inserted behind the hooks' back, e.g. by another deployment sharing the database
+    with engine.begin() as conn:
+        conn.execute(insert(Task.__table__), [{"title": "Repot plants", "priority": "Medium", "enable_reminder": False,
+                                              "created_at": datetime.utcnow(), "user_id": created["user_id"]}])
+
+    assert sorted(_search(client, auth_headers, "plants")) == ["Repot plants", "Water plants"]
+
+
+def test_index_from_another_embedder_is_treated_as_missing():
+    directory = tempfile.mkdtemp(prefix="semantic-index-")
+    built = UserIndex(directory, user_id=1, dim=DIM, fingerprint="old:Embedder/16")
+    built._grow(0)
+    built._save()
+    assert UserIndex(directory, user_id=1, dim=DIM, fingerprint="old:Embedder/16").exists
+    assert not UserIndex(directory, user_id=1, dim=DIM, fingerprint="new:Embedder/16").exists
+    assert not UserIndex(directory, user_id=1, dim=DIM * 2, fingerprint="old:Embedder/16").exists
@@ -0,0 +1,24 @@
+# backend/tests/test_startup.py
+import asyncio
+
+from config import settings
+from core.startup import measure_import_times, run_lifespan
+
+
+def test_boot_time_within_budget():
+    import_ms, modules = measure_import_times("main")
+    lifespan = asyncio.run(run_lifespan("main"))
+
+    assert import_ms > 0 and modules
+    assert any(name.startswith("lifespan:") for name, _ in lifespan.phases)
+    boot_ms = import_ms + lifespan.total_ms
+    assert boot_ms <= settings.BOOT_TIME_BUDGET_MS, (
+        f"Boot took {boot_ms:.0f} ms (imports {import_ms:.0f} ms, lifespan {lifespan.total_ms:.0f} ms), "
+        f"budget is {settings.BOOT_TIME_BUDGET_MS} ms"
+    )
+
+
+def test_lifespan_report_covers_only_the_latest_run():
+    first = asyncio.run(run_lifespan("main"))
+    second = asyncio.run(run_lifespan("main"))
+    assert [name for name, _ in second.phases] == [name for name, _ in first.phases]
@@ -0,0 +1,139 @@
+# backend/tests/test_task_io.py
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from config import settings
+from services import task_io
+from services.archival import run_archival_pass
+from services.task_io import _iter_records, stream_tasks_export
+
+
+def _records(data: bytes, fmt: str):
+    return [(line, record if isinstance(record, dict) else type(record)) for line, record in _iter_records(io.BytesIO(data), fmt)]
+
+
+def test_ndjson_bad_utf8_only_rejects_its_line():
+    data = b"\n".join([
+        json.dumps({"title": "first"}).encode(),
+        b'{"title": "\xff\xfe"}',
+        json.dumps({"title": "third"}).encode(),
+    ])
+    assert _records(data, "ndjson") == [(1, {"title": "first"}), (2, ValueError), (3, {"title": "third"})]
+
+
+def test_csv_bad_utf8_and_malformed_rows_only_reject_their_lines():
+    data = b"".join([
+        "﻿title,priority\r\n".encode(),
+        b"ok,High\r\n",
+        b"bad \xff bytes,Low\r\n",
+        b"huge," + b"x" * 200_000 + b"\r\n",
+        b'"multi\r\nline",Medium\r\n',
+    ])
+    assert _records(data, "csv") == [
+        (2, {"title": "ok", "priority": "High"}),
+        (3, ValueError),
+        (4, ValueError),
+        (6, {"title": "multi\r\nline", "priority": "Medium"}),
+    ]
+
+
+def test_import_reports_undecodable_lines(client, auth_headers):
+    upload = b'{"title": "kept"}\n\xff\xfe\n'
+    response = client.post(
+        "/tasks/import",
+        files={"file": ("tasks.ndjson", upload, "application/x-ndjson")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["imported"], body["failed"]) == (1, 1)
+    assert body["errors"] == [{"line": 2, "error": "Line is not valid UTF-8"}]
+
+
+def _create(client, headers, **fields) -> dict:
+    response = client.post("/tasks/", json=fields, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_export_streams_in_chunks(client, auth_headers, monkeypatch):
+    user_id = [_create(client, auth_headers, title=f"Task {i}") for i in range(3)][0]["user_id"]
+    monkeypatch.setattr(task_io, "_FLUSH_BYTES", 1)
+
+    chunks = list(stream_tasks_export(user_id, "ndjson"))
+    assert [json.loads(chunk)["title"] for chunk in chunks] == ["Task 0", "Task 1", "Task 2"]
+
+
+def test_export_ndjson_and_csv(client, auth_headers):
+    _create(client, auth_headers, title="Pay rent", priority="High", description="by the 1st")
+
+    ndjson = client.get("/tasks/export", headers=auth_headers)
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    [row] = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert (row["title"], row["priority"], row["description"]) == ("Pay rent", "High", "by the 1st")
+
+    exported = client.get("/tasks/export", params={"format": "csv"}, headers=auth_headers)
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in exported.headers["content-disposition"]
+    [row] = list(csv.DictReader(io.StringIO(exported.text)))
+    assert (row["title"], row["priority"], row["description"]) == ("Pay rent", "High", "by the 1st")
+
+
+def test_export_include_archived(client, auth_headers):
+    due = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    _create(client, auth_headers, title="Old tax return", due_date=due)
+    _create(client, auth_headers, title="Current")
+    assert asyncio.run(run_archival_pass()) >= 1
+
+    def titles(**params):
+        response = client.get("/tasks/export", params=params, headers=auth_headers)
+        return sorted(json.loads(line)["title"] for line in response.text.splitlines())
+
+    assert titles() == ["Current"]
+    assert titles(include_archived=True) == ["Current", "Old tax return"]
+
+
+def test_export_import_round_trip(client, auth_headers, monkeypatch):
+    due = (datetime.utcnow() + timedelta(days=3)).replace(microsecond=0).isoformat()
+    _create(client, auth_headers, title="Dentist", priority="Low", due_date=due, enable_reminder=True)
+    _create(client, auth_headers, title="Groceries", description="milk, eggs")
+
+    fields = ["title", "description", "priority", "due_date", "enable_reminder", "created_at"]
+    for fmt in ("ndjson", "csv"):
+        exported = client.get("/tasks/export", params={"format": fmt}, headers=auth_headers).content
+        other = client.post("/auth/register", json={"email": f"copy-{fmt}@example.com", "password": "secret123"})
+        headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+
+        imported = client.post(
+            "/tasks/import",
+            params={"format": fmt},
+            files={"file": (f"tasks.{fmt}", exported)},
+            headers=headers,
+        )
+        assert imported.status_code == 200, imported.text
+        assert (imported.json()["imported"], imported.json()["failed"]) == (2, 0)
+
+        def rows(h):
+            return sorted(({f: t[f] for f in fields} for t in client.get("/tasks/", headers=h).json()), key=lambda t: t["title"])
+
+        assert rows(headers) == rows(auth_headers), fmt
+
+
+def test_import_streams_progress_per_batch(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    upload = "\n".join([json.dumps({"title": f"Task {i}"}) for i in range(5)] + ["{not json"]).encode()
+
+    response = client.post(
+        "/tasks/import",
+        params={"progress": True},
+        files={"file": ("tasks.ndjson", upload)},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["imported"], line["batches"]) for line in lines] == [(2, 1), (4, 2), (5, 3)]
+    assert lines[-1]["done"] is True and lines[-1]["failed"] == 1
+    assert len(client.get("/tasks/", headers=auth_headers).json()) == 5